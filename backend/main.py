@@ -1,9 +1,48 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import asyncio
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+import sys
+import os
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.insert(0, BASE_DIR)
+
 from routes.upload import router as upload_router
 from routes.dashboard import router as dashboard_router
+from routes.batch import router as batch_router
+from routes.chunked import router as chunked_router
+from batch import shutdown_pools
+from utils.database import get_engine, dispose_engine, get_async_engine, dispose_async_engine
+from insights import get_model
+from lifecycle import ensure_lifecycle_schema, run_lifecycle_loop
+from utils.observability import (
+    PROFILE_HEADER,
+    REQUEST_SECONDS,
+    render_metrics,
+    start_trace,
+)
 
-app = FastAPI(title="AnalyzeIQ API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy clients are built once per worker here, not at import,
+    # so importing the app (tests, tooling, reloads) stays fast
+    get_engine()
+    get_async_engine()
+    get_model()
+    try:
+        ensure_lifecycle_schema()
+    except Exception as e:
+        print(f"⚠️ Could not prepare the uploads table for lifecycle tracking: {e}")
+    lifecycle = asyncio.create_task(run_lifecycle_loop())
+    yield
+    lifecycle.cancel()
+    shutdown_pools()
+    dispose_engine()
+    await dispose_async_engine()
+
+app = FastAPI(title="AnalyzeIQ API", version="1.0.0", lifespan=lifespan)
 
 # Allow React frontend to talk to FastAPI
 app.add_middleware(
@@ -14,10 +53,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request timing + trace id for every call
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    trace_id = start_trace(
+        request.headers.get("x-request-id"),
+        profile=request.headers.get(PROFILE_HEADER) == "1",
+    )
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["x-request-id"] = trace_id
+        return response
+    finally:
+        # Label by route template, not raw path, to keep cardinality low
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        REQUEST_SECONDS.labels(request.method, path, str(status)).observe(
+            time.perf_counter() - start
+        )
+
 # Routes
 app.include_router(upload_router, prefix="/api")
+app.include_router(batch_router, prefix="/api")
+app.include_router(chunked_router, prefix="/api")
 app.include_router(dashboard_router, prefix="/api")
 
 @app.get("/")
 def root():
-    return {"status": "AnalyzeIQ API is running"}
\ No newline at end of file
+    return {"status": "AnalyzeIQ API is running"}
+
+@app.get("/metrics")
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,237 @@
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List
+import sys
+import os
+import shutil
+import threading
+import time
+import uuid
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.insert(0, os.path.join(BASE_DIR, "layers/layer1_ingestion"))
+sys.path.insert(0, os.path.join(BASE_DIR, "layers/layer2_sql"))
+sys.path.insert(0, BASE_DIR)
+
+from ingestion import get_extension, supported_extensions
+from batch import ARCHIVE_EXTENSIONS, expand_archives, unique_path, ingest_batch, group_by_schema, combine_frames
+from sql_engine import push_to_postgres
+from utils.observability import span
+from routes.upload import UPLOAD_DIR
+
+router = APIRouter()
+
+# Parallel table loads share the engine's connection pool, keep this
+# at or below the pool size
+LOAD_WORKERS = int(os.getenv("BATCH_LOAD_WORKERS", "4"))
+
+# Batch progress lives in memory, so poll the same worker that took the upload
+BATCH_JOBS = {}
+# Finished batches are forgotten this long after they end
+BATCH_JOB_TTL_S = int(os.getenv("BATCH_JOB_TTL_S", "3600"))
+_jobs_lock = threading.Lock()
+
+# -----------------------------------------------
+# POST — Upload several files or a ZIP archive
+# -----------------------------------------------
+
+@router.post("/upload/batch", status_code=202)
+async def upload_batch(background_tasks: BackgroundTasks,
+                       files: List[UploadFile] = File(...),
+                       combine: bool = Form(False)):
+    """
+    Saves every file, expands ZIP archives, and processes the batch in
+    the background. Poll GET /upload/batch/{batch_id} for progress.
+    With combine=true, files that share the same columns are loaded
+    into a single table.
+    """
+    allowed_types = set(supported_extensions()) | ARCHIVE_EXTENSIONS
+    for file in files:
+        extension = get_extension(file.filename)
+        if extension not in allowed_types:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type: {file.filename}")
+
+    batch_id = str(uuid.uuid4())
+    batch_dir = os.path.join(UPLOAD_DIR, f"batch_{batch_id}")
+    os.makedirs(batch_dir, exist_ok=True)
+
+    saved = []
+    for file in files:
+        # Same file name twice in one batch → name_1.csv, so neither is overwritten
+        temp_path = unique_path(batch_dir, os.path.basename(file.filename))
+        with open(temp_path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        saved.append(temp_path)
+
+    try:
+        paths = expand_archives(saved, batch_dir)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read archive: {e}")
+
+    if not paths:
+        raise HTTPException(status_code=400, detail="No supported files found in upload")
+
+    names = {path: os.path.relpath(path, batch_dir) for path in paths}
+    job = create_job(batch_id, names, combine)
+    background_tasks.add_task(run_batch, batch_id, paths, names, combine)
+    return job
+
+
+# -----------------------------------------------
+# GET — Batch progress
+# -----------------------------------------------
+
+@router.get("/upload/batch/{batch_id}")
+def get_batch_status(batch_id: str):
+    with _jobs_lock:
+        evict_finished_jobs()
+        job = BATCH_JOBS.get(batch_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown batch: {batch_id}")
+        return snapshot(job)
+
+
+# -----------------------------------------------
+# JOB STATE — Per-file and whole-batch progress
+# -----------------------------------------------
+
+def create_job(batch_id: str, names: dict, combine: bool) -> dict:
+    job = {
+        "batch_id": batch_id,
+        "status": "queued",
+        "combine": combine,
+        "total": len(names),
+        "completed": 0,
+        "failed": 0,
+        "progress": 0.0,
+        "files": {
+            name: {"status": "queued", "rows": None, "table_name": None, "error": None}
+            for name in names.values()
+        },
+        "tables": [],
+        "error": None,
+        "finished_at": None,
+    }
+    with _jobs_lock:
+        evict_finished_jobs()
+        BATCH_JOBS[batch_id] = job
+        return snapshot(job)
+
+
+def update_file(batch_id: str, name: str, status: str, **fields) -> None:
+    with _jobs_lock:
+        job = BATCH_JOBS[batch_id]
+        entry = job["files"][name]
+        entry["status"] = status
+        entry.update(fields)
+
+        if status in ("ready", "failed"):
+            count_files(job)
+
+
+def count_files(job: dict) -> None:
+    job["completed"] = sum(f["status"] == "ready" for f in job["files"].values())
+    job["failed"] = sum(f["status"] == "failed" for f in job["files"].values())
+    job["progress"] = round((job["completed"] + job["failed"]) / job["total"], 3)
+
+
+def set_job_status(batch_id: str, status: str, error: str = None) -> None:
+    with _jobs_lock:
+        job = BATCH_JOBS[batch_id]
+        job["status"] = status
+        if status in ("complete", "failed"):
+            job["finished_at"] = time.time()
+        if error is not None:
+            job["error"] = error
+            # Files the batch never got to can't finish any more
+            for entry in job["files"].values():
+                if entry["status"] not in ("ready", "failed"):
+                    entry["status"], entry["error"] = "failed", error
+            count_files(job)
+
+
+def evict_finished_jobs() -> None:
+    # Caller holds _jobs_lock
+    cutoff = time.time() - BATCH_JOB_TTL_S
+    for batch_id in [b for b, job in BATCH_JOBS.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+        del BATCH_JOBS[batch_id]
+
+
+def snapshot(job: dict) -> dict:
+    return {
+        **job,
+        "files": {name: dict(entry) for name, entry in job["files"].items()},
+        "tables": list(job["tables"]),
+    }
+
+
+# -----------------------------------------------
+# WORKER — Ingest in parallel, then load tables
+# -----------------------------------------------
+
+def run_batch(batch_id: str, paths: list, names: dict, combine: bool) -> None:
+    """
+    Layer 1 runs in the format-specific process pools; Layer 2 loads run
+    on threads that share the engine's connection pool.
+    """
+    set_job_status(batch_id, "running")
+    error = "Batch stopped unexpectedly"
+    try:
+        with span("upload_batch", files=len(paths), combine=combine):
+            def on_progress(path, status, result):
+                if status == "failed":
+                    update_file(batch_id, names[path], "failed", error=str(result))
+                elif status == "ingested":
+                    update_file(batch_id, names[path], "ingested", rows=len(result))
+                else:
+                    update_file(batch_id, names[path], status)
+
+            results = ingest_batch(paths, on_progress)
+            frames = {path: df for path, df in results.items() if not isinstance(df, Exception)}
+
+            # Each load is (paths it covers, DataFrame, file name for the table)
+            loads = []
+            groups = group_by_schema(frames) if combine else [[path] for path in frames]
+            for group in groups:
+                if len(group) == 1:
+                    loads.append((group, frames[group[0]], os.path.basename(group[0])))
+                else:
+                    name = os.path.basename(group[0])
+                    ext = get_extension(name)
+                    stem = name[:-len(ext) - 1]
+                    loads.append((group, combine_frames(frames, group), f"{stem}_combined.{ext}"))
+
+            with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as pool:
+                futures = {}
+                for group, df, file_name in loads:
+                    for path in group:
+                        update_file(batch_id, names[path], "loading")
+                    futures[pool.submit(push_to_postgres, df, file_name=file_name)] = group
+
+                for future in as_completed(futures):
+                    group = futures[future]
+                    try:
+                        metadata = future.result()
+                    except Exception as e:
+                        for path in group:
+                            update_file(batch_id, names[path], "failed", error=f"Database error: {e}")
+                        continue
+
+                    with _jobs_lock:
+                        BATCH_JOBS[batch_id]["tables"].append({
+                            "table_name": metadata["table_name"],
+                            "upload_id": metadata["upload_id"],
+                            "rows": metadata["rows"],
+                            "columns": metadata["columns"],
+                            "files": [names[path] for path in group],
+                        })
+                    for path in group:
+                        update_file(batch_id, names[path], "ready", table_name=metadata["table_name"])
+        error = None
+    except Exception as e:
+        # e.g. a crashed worker pool (BrokenProcessPool) or a failed merge
+        print(f"⚠️ Batch {batch_id} failed: {e}")
+        error = str(e) or type(e).__name__
+    finally:
+        # Always end the job, so pollers stop
+        set_job_status(batch_id, "failed" if error else "complete", error=error)
@@ -0,0 +1,451 @@
+from fastapi import APIRouter, HTTPException, Request, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import Optional
+import hashlib
+import json
+import sys
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.insert(0, os.path.join(BASE_DIR, "layers/layer1_ingestion"))
+sys.path.insert(0, os.path.join(BASE_DIR, "layers/layer2_sql"))
+sys.path.insert(0, BASE_DIR)
+
+from ingestion import get_extension, supported_extensions
+from streaming import CSVStreamParser, STREAMABLE_EXTENSIONS
+from sql_engine import StreamingTableLoader
+from utils.observability import span
+from routes.upload import UPLOAD_DIR, load_file
+
+router = APIRouter()
+
+SESSION_DIR = os.path.join(UPLOAD_DIR, "sessions")
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+STREAM_READ_SIZE = 8 * 1024 * 1024
+# Largest file a session may declare (it is pre-allocated at that size)
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_SESSION_MAX_BYTES", str(20 * 1024 ** 3)))
+# Sessions without a new chunk for this long are deleted with their partial load
+SESSION_TTL_S = int(os.getenv("UPLOAD_SESSION_TTL_S", "86400"))
+
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+# Open sessions by id; sessions that outlive a restart are reloaded from disk
+SESSIONS = {}
+_sessions_lock = threading.Lock()
+
+
+class CreateSession(BaseModel):
+    file_name: str
+    size: int
+    chunk_size: Optional[int] = None
+
+
+class FinalizeSession(BaseModel):
+    sha256: Optional[str] = None
+
+
+# -----------------------------------------------
+# SESSION — Byte ranges on disk + streaming state
+# -----------------------------------------------
+
+class UploadSession:
+    """
+    One resumable upload. Chunks are written straight into a pre-sized
+    file at their offset, and the received ranges are saved next to it,
+    so a client can resume after a dropped connection or a restart.
+    For streamable formats, the contiguous prefix is parsed and loaded
+    while later chunks are still arriving.
+    """
+
+    def __init__(self, session_id: str, file_name: str, size: int, chunk_size: int,
+                 received: list = None, streaming: bool = True):
+        self.session_id = session_id
+        self.file_name = file_name
+        self.size = size
+        self.chunk_size = chunk_size
+        self.received = received or []
+        self.extension = get_extension(file_name)
+
+        self.dir = os.path.join(SESSION_DIR, session_id)
+        self.data_path = os.path.join(self.dir, f"data.{self.extension}")
+        self.meta_path = os.path.join(self.dir, "session.json")
+        self.lock = threading.Lock()
+
+        # Streaming state only lives in memory: a reloaded session falls
+        # back to parsing the whole file at finalize (see load)
+        self.streaming = streaming and self.extension in STREAMABLE_EXTENSIONS
+        self.stream_lock = threading.Lock()
+        self.parser = CSVStreamParser() if self.streaming else None
+        self.loader = None
+        self.parsed_offset = 0
+        self.stream_error = None
+        self.finalized = False
+
+    @classmethod
+    def create(cls, file_name: str, size: int, chunk_size: int) -> "UploadSession":
+        session = cls(str(uuid.uuid4()), file_name, size, chunk_size)
+        os.makedirs(session.dir, exist_ok=True)
+        with open(session.data_path, "wb") as f:
+            f.truncate(size)
+        session.save()
+        return session
+
+    @classmethod
+    def load(cls, session_id: str) -> "UploadSession":
+        meta_path = os.path.join(SESSION_DIR, session_id, "session.json")
+        if not re.fullmatch(r"[0-9a-f-]{36}", session_id) or not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        session = cls(session_id, meta["file_name"], meta["size"], meta["chunk_size"],
+                      received=meta["received"], streaming=False)
+        if meta.get("loader"):
+            # The earlier process's partial table can't be continued: drop it
+            StreamingTableLoader.abort_saved(meta["loader"])
+            with session.lock:
+                session.save()
+        return session
+
+    def save(self) -> None:
+        meta = {
+            "file_name": self.file_name,
+            "size": self.size,
+            "chunk_size": self.chunk_size,
+            "received": self.received,
+            "loader": self.loader.state() if self.loader else None,
+        }
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def start_loader(self) -> None:
+        self.loader = StreamingTableLoader(self.file_name)
+        # Saved so a restart or expiry can drop the partial table
+        with self.lock:
+            self.save()
+
+    def write_chunk(self, start: int, data: bytes) -> None:
+        with open(self.data_path, "r+b") as f:
+            f.seek(start)
+            f.write(data)
+        with self.lock:
+            self.received = merge_ranges(self.received + [[start, start + len(data)]])
+            self.save()
+
+    def contiguous_end(self) -> int:
+        with self.lock:
+            if self.received and self.received[0][0] == 0:
+                return self.received[0][1]
+            return 0
+
+    def missing(self) -> list:
+        with self.lock:
+            gaps, position = [], 0
+            for start, end in self.received:
+                if start > position:
+                    gaps.append([position, start])
+                position = max(position, end)
+            if position < self.size:
+                gaps.append([position, self.size])
+            return gaps
+
+    def status(self) -> dict:
+        missing = self.missing()
+        with self.lock:
+            received = [list(r) for r in self.received]
+        return {
+            "session_id": self.session_id,
+            "file_name": self.file_name,
+            "size": self.size,
+            "chunk_size": self.chunk_size,
+            "bytes_received": sum(end - start for start, end in received),
+            "received": received,
+            "missing": missing,
+            "complete": not missing,
+            "streaming": {
+                "enabled": self.streaming,
+                "parsed_bytes": self.parsed_offset,
+                "rows_loaded": self.loader.rows if self.loader else 0,
+                "error": self.stream_error,
+            },
+        }
+
+
+def merge_ranges(ranges: list) -> list:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def get_session(session_id: str) -> UploadSession:
+    with _sessions_lock:
+        session = SESSIONS.get(session_id)
+        if session is None:
+            session = UploadSession.load(session_id)
+            if session is None:
+                raise HTTPException(status_code=404, detail=f"Unknown upload session: {session_id}")
+            SESSIONS[session_id] = session
+        return session
+
+
+# -----------------------------------------------
+# STREAMING — Parse + load the contiguous prefix
+# -----------------------------------------------
+
+def advance_stream(session: UploadSession) -> None:
+    """
+    Feeds newly contiguous bytes to the parser and loads finished rows.
+    Runs after each chunk; if another thread is already catching up,
+    this call returns and leaves the work to it.
+    """
+    while session.streaming and not session.stream_error and not session.finalized:
+        if not session.stream_lock.acquire(blocking=False):
+            return
+        try:
+            drain_stream(session)
+        finally:
+            session.stream_lock.release()
+        # A chunk may have landed between the last check and the release
+        if session.parsed_offset >= session.contiguous_end():
+            return
+
+
+def drain_stream(session: UploadSession) -> None:
+    """
+    Caller must hold session.stream_lock.
+    """
+    try:
+        while session.parsed_offset < session.contiguous_end() and not session.stream_error:
+            length = min(STREAM_READ_SIZE, session.contiguous_end() - session.parsed_offset)
+            with open(session.data_path, "rb") as f:
+                f.seek(session.parsed_offset)
+                data = f.read(length)
+            session.parsed_offset += len(data)
+
+            df = session.parser.feed(data)
+            if df is not None and not df.empty:
+                if session.loader is None:
+                    session.start_loader()
+                session.loader.append(df)
+    except Exception as e:
+        session.stream_error = str(e)
+        print(f"⚠️ Streaming load failed, will parse at finalize: {e}")
+
+
+# -----------------------------------------------
+# POST — Create an upload session
+# -----------------------------------------------
+
+@router.post("/upload/sessions", status_code=201)
+def create_session(body: CreateSession):
+    extension = get_extension(body.file_name)
+    if extension not in supported_extensions():
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {extension}")
+    if body.size <= 0:
+        raise HTTPException(status_code=400, detail="File size must be positive")
+    if body.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File larger than {MAX_UPLOAD_BYTES} bytes")
+
+    expire_sessions()
+    chunk_size = min(body.chunk_size or DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE)
+    session = UploadSession.create(os.path.basename(body.file_name), body.size, chunk_size)
+    with _sessions_lock:
+        SESSIONS[session.session_id] = session
+    return session.status()
+
+
+def expire_sessions() -> list:
+    """
+    Deletes sessions (in memory or left on disk by an earlier process)
+    that got no chunk for SESSION_TTL_S: the pre-sized file goes, and a
+    partly streamed table is dropped. Returns the expired session ids.
+    """
+    if not os.path.isdir(SESSION_DIR):
+        return []
+    cutoff = time.time() - SESSION_TTL_S
+    expired = []
+    for session_id in os.listdir(SESSION_DIR):
+        path = os.path.join(SESSION_DIR, session_id)
+        meta_path = os.path.join(path, "session.json")
+        try:
+            # session.json is rewritten on every chunk
+            last_active = os.path.getmtime(meta_path if os.path.exists(meta_path) else path)
+        except OSError:
+            continue
+        if last_active >= cutoff:
+            continue
+
+        with _sessions_lock:
+            session = SESSIONS.get(session_id)
+            if session is not None:
+                if not session.stream_lock.acquire(blocking=False):
+                    continue  # being drained or finalized right now
+                session.finalized = True
+                session.stream_lock.release()
+                del SESSIONS[session_id]
+
+        try:
+            if session is not None:
+                if session.loader is not None:
+                    session.loader.abort()
+            elif os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    state = json.load(f).get("loader")
+                if state:
+                    StreamingTableLoader.abort_saved(state)
+        except Exception as e:
+            print(f"⚠️ Could not drop the partial load of session {session_id}: {e}")
+        shutil.rmtree(path, ignore_errors=True)
+        expired.append(session_id)
+    return expired
+
+
+# -----------------------------------------------
+# GET — Session status (which ranges to resend)
+# -----------------------------------------------
+
+@router.get("/upload/sessions/{session_id}")
+def get_session_status(session_id: str):
+    return get_session(session_id).status()
+
+
+# -----------------------------------------------
+# PUT — Upload one byte range
+# -----------------------------------------------
+
+@router.put("/upload/sessions/{session_id}")
+async def upload_chunk(session_id: str, request: Request, background_tasks: BackgroundTasks):
+    """
+    Body is the raw chunk. Headers:
+    - Content-Range: bytes <start>-<end inclusive>/<total size>
+    - X-Chunk-SHA256: hex digest of the body
+    Resending a range that was already received is harmless.
+    """
+    session = get_session(session_id)
+    if session.finalized:
+        raise HTTPException(status_code=409, detail="Session already finalized")
+
+    match = CONTENT_RANGE.fullmatch(request.headers.get("content-range", ""))
+    if not match:
+        raise HTTPException(status_code=400, detail="Missing or invalid Content-Range header")
+    start, end, total = (int(g) for g in match.groups())
+    if total != session.size or start > end or end >= session.size:
+        raise HTTPException(status_code=416, detail="Range does not fit this upload")
+    if end - start + 1 > MAX_CHUNK_SIZE:
+        raise HTTPException(status_code=413, detail="Chunk too large")
+
+    checksum = request.headers.get("x-chunk-sha256")
+    if not checksum:
+        raise HTTPException(status_code=400, detail="Missing X-Chunk-SHA256 header")
+
+    expected = end - start + 1
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length != str(expected):
+        raise HTTPException(status_code=400, detail="Body length does not match Content-Range")
+    data = await read_body(request, expected)
+    if len(data) != expected:
+        raise HTTPException(status_code=400, detail="Body length does not match Content-Range")
+    if hashlib.sha256(data).hexdigest() != checksum.lower():
+        raise HTTPException(status_code=422, detail="Chunk checksum mismatch, resend this range")
+
+    with span("upload.chunk", bytes=len(data)):
+        await run_in_threadpool(session.write_chunk, start, data)
+
+    if session.streaming:
+        background_tasks.add_task(advance_stream, session)
+    return session.status()
+
+
+async def read_body(request: Request, limit: int) -> bytes:
+    """
+    Reads the body as it streams in, stopping as soon as it goes past
+    limit bytes (chunked bodies have no Content-Length to check first).
+    """
+    body = bytearray()
+    async for piece in request.stream():
+        body += piece
+        if len(body) > limit:
+            raise HTTPException(status_code=400, detail="Body length does not match Content-Range")
+    return bytes(body)
+
+
+# -----------------------------------------------
+# POST — Finalize: verify and finish loading
+# -----------------------------------------------
+
+@router.post("/upload/sessions/{session_id}/finalize")
+def finalize_session(session_id: str, body: FinalizeSession = None):
+    """
+    Checks every byte arrived (and the whole-file SHA-256, if given),
+    then finishes the streaming load or, for non-streamable formats,
+    runs the regular Layer 1 + Layer 2 pipeline on the assembled file.
+    """
+    session = get_session(session_id)
+    if session.missing():
+        raise HTTPException(status_code=409, detail={"message": "Upload incomplete",
+                                                     "missing": session.missing()})
+
+    with session.stream_lock:
+        if session.finalized:
+            raise HTTPException(status_code=409, detail="Session already finalized")
+
+        if body and body.sha256 and file_sha256(session.data_path) != body.sha256.lower():
+            raise HTTPException(status_code=422, detail="File checksum mismatch")
+
+        metadata = None
+        with span("upload.finalize", streaming=session.streaming):
+            if session.streaming and not session.stream_error:
+                drain_stream(session)
+                try:
+                    if not session.stream_error:
+                        df = session.parser.close()
+                        if df is not None and not df.empty:
+                            if session.loader is None:
+                                session.start_loader()
+                            session.loader.append(df)
+                        if session.loader is not None:
+                            metadata = session.loader.finish()
+                except Exception as e:
+                    session.stream_error = str(e)
+
+            if metadata is None:
+                if session.loader is not None:
+                    session.loader.abort()
+                metadata = load_file(session.data_path, session.file_name)
+
+        session.finalized = True
+
+    with _sessions_lock:
+        SESSIONS.pop(session_id, None)
+    shutil.rmtree(session.dir, ignore_errors=True)
+
+    return {
+        "success": True,
+        "upload_id": metadata["upload_id"],
+        "table_name": metadata["table_name"],
+        "file_name": metadata["file_name"],
+        "rows": metadata["rows"],
+        "columns": metadata["columns"],
+        "column_names": metadata["column_names"],
+        "streamed": session.streaming and not session.stream_error,
+    }
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
@@ -1,6 +1,12 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+import asyncio
+import math
 import sys
+import time
+import uuid
 import pandas as pd
 import os
 import numpy as np
@@ -21,89 +27,451 @@ sys.path.insert(0, os.path.join(BASE_DIR, "layers/layer2_sql"))
 sys.path.insert(0, os.path.join(BASE_DIR, "layers/layer3_dashboard"))
 sys.path.insert(0, BASE_DIR)
 
-from sql_engine import run_query, get_table_schema
-from insights import generate_insights
+from sql_engine import run_query_async, get_table_schema_async, validate_table_name, quote_ident
+from lifecycle import touch_table_async
+from insights import generate_insights, PROFILE_MAX_ROWS
+from utils.observability import span, profile_request
 
 router = APIRouter()
 
+# PostgreSQL type names (as reported by the schema inspector) per column role
+NUMERIC_TYPES = ("SMALLINT", "INTEGER", "BIGINT", "REAL", "DOUBLE PRECISION", "FLOAT", "NUMERIC", "DECIMAL")
+DATE_TYPES = ("TIMESTAMP", "DATE")
+TEXT_TYPES = ("TEXT", "VARCHAR", "CHAR")
+
+PREVIEW_ROWS = 100
+
+# -----------------------------------------------
+# APPROXIMATE MODE CONFIG
+# -----------------------------------------------
+
+DASHBOARD_MODES = ("auto", "exact", "approx")
+# mode=auto switches to sampled aggregates above this many (estimated) rows
+APPROX_ROW_THRESHOLD = int(os.getenv("APPROX_ROW_THRESHOLD", "5000000"))
+# Rows the sample should hold; the sampling percentage follows from the table size
+APPROX_SAMPLE_ROWS = int(os.getenv("APPROX_SAMPLE_ROWS", "100000"))
+# SYSTEM samples whole pages (reads ~1% of the table for a 1% sample);
+# BERNOULLI samples rows but still scans every page
+APPROX_SAMPLE_METHOD = os.getenv("APPROX_SAMPLE_METHOD", "SYSTEM").upper()
+# Same pages on every request, so repeated views and the queries of one
+# request agree with each other
+APPROX_SEED = 42
+# z for the 95% confidence intervals returned with approximate values
+APPROX_Z = 1.96
+
+# Sampling unit per method: the page for SYSTEM, the row for BERNOULLI
+SAMPLE_UNITS = {"SYSTEM": "(ctid::text::point)[0]", "BERNOULLI": "ctid"}
+
+# Exact recomputations, one running per table; in memory, like batch jobs.
+# Viewers of the same table share a job, so a finished one is kept
+# EXACT_JOB_TTL_S for all of them to fetch
+EXACT_JOBS = {}
+EXACT_JOB_TTL_S = int(os.getenv("EXACT_JOB_TTL_S", "600"))
+
 # -----------------------------------------------
 # GET — Full dashboard data for a table
 # -----------------------------------------------
 
 @router.get("/dashboard/{table_name}")
-def get_dashboard(table_name: str):
+async def get_dashboard(table_name: str, mode: str = "auto", upgrade: bool = False):
     """
     Returns everything the React frontend needs
     to render the full dashboard for a given table.
+    Aggregates run in PostgreSQL, concurrently on the async pool;
+    only the preview rows and a sample for the insights are fetched.
+    Archived tables answer 202 {"status": "rehydrating"} while they
+    are reloaded; poll until the dashboard comes back.
+
+    mode=approx (or auto, above APPROX_ROW_THRESHOLD rows) computes
+    metrics and charts from a TABLESAMPLE with 95% confidence
+    intervals. Exact values are computed in the background only on
+    request (POST /dashboard/{table_name}/exact, or upgrade=true here):
+    poll GET /dashboard/{table_name}/exact/{job_id}.
     """
+    if mode not in DASHBOARD_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(DASHBOARD_MODES)}")
     try:
-        # Fetch all data from the table
-        df = run_query(f"SELECT * FROM {table_name}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Query failed: {e}")
+        validate_table_name(table_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if await touch_table_async(table_name) == "rehydrating":
+        return JSONResponse(status_code=202, content={"table_name": table_name, "status": "rehydrating"})
+
+    with profile_request("dashboard"), span("get_dashboard", table=table_name, mode=mode) as s:
+        # Schema + planner row estimate (no scan)
+        with span("dashboard.schema"):
+            schema, estimated_rows = await asyncio.gather(
+                get_table_schema_async(table_name),
+                estimate_rows(table_name),
+                return_exceptions=True,
+            )
+        if isinstance(schema, LookupError):
+            raise HTTPException(status_code=404, detail=str(schema))
+        for result in (schema, estimated_rows):
+            if isinstance(result, Exception):
+                raise HTTPException(status_code=500, detail=f"Schema fetch failed: {result}")
+
+        approximate = mode == "approx" or (
+            mode == "auto" and estimated_rows is not None and estimated_rows > APPROX_ROW_THRESHOLD
+        )
+        if not approximate or estimated_rows is None:
+            # Never analyzed yet: count, and size the sample from that
+            count = await run_query_async(f"SELECT COUNT(*) AS n FROM {quote_ident(table_name)}")
+            estimated_rows = int(count["n"].iloc[0])
+        s["rows"] = estimated_rows
+        s["approximate"] = approximate
+
+        roles = column_roles(schema)
+        numeric_cols, categorical_cols, date_cols = roles["numeric"], roles["categorical"], roles["date"]
+
+        # Metrics, chart data, preview and insights sample, all at once
+        try:
+            with span("dashboard.aggregate", rows=estimated_rows, approximate=approximate):
+                if approximate:
+                    sample_spec = sample_clause(estimated_rows)
+                    (metrics, total_rows, rows_ci), bar_chart, line_chart, preview, sample = await asyncio.gather(
+                        fetch_metrics_approx(table_name, numeric_cols, sample_spec),
+                        fetch_grouped_sum_approx(table_name, categorical_cols[:1], numeric_cols[:1], sample_spec),
+                        fetch_grouped_sum_approx(table_name, date_cols[:1], numeric_cols[:1], sample_spec),
+                        run_query_async(f"SELECT * FROM {quote_ident(table_name)} LIMIT {PREVIEW_ROWS}"),
+                        run_query_async(f"SELECT * FROM {quote_ident(table_name)} {sample_spec['sql']} "
+                                        f"LIMIT {PROFILE_MAX_ROWS}"),
+                    )
+                else:
+                    sample_spec, total_rows, rows_ci = None, estimated_rows, None
+                    metrics, bar_chart, line_chart, preview, sample = await asyncio.gather(
+                        fetch_metrics(table_name, numeric_cols),
+                        fetch_grouped_sum(table_name, categorical_cols[:1], numeric_cols[:1]),
+                        fetch_grouped_sum(table_name, date_cols[:1], numeric_cols[:1]),
+                        run_query_async(f"SELECT * FROM {quote_ident(table_name)} LIMIT {PREVIEW_ROWS}"),
+                        fetch_sample(table_name, total_rows),
+                    )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Query failed: {e}")
+
+        # AI Insights (blocking LLM call, kept off the event loop)
+        with span("generate_insights", table=table_name):
+            insights = await run_in_threadpool(
+                generate_insights, sample, table_name, total_rows=total_rows
+            )
+
+        return {
+            "table_name": table_name,
+            "schema": schema,
+            "mode": "approx" if approximate else "exact",
+            "total_rows": total_rows,
+            "total_rows_ci": rows_ci,
+            "sample": sample_spec and {"method": sample_spec["method"], "percent": sample_spec["percent"],
+                                       "confidence": 0.95},
+            "upgrade": start_exact_upgrade(table_name, roles) if approximate and upgrade else None,
+            "metrics": metrics,
+            "bar_chart": bar_chart,
+            "line_chart": line_chart,
+            "raw_data": preview.fillna("").to_dict(orient="records"),
+            "insights": insights,
+            "numeric_cols": numeric_cols,
+            "categorical_cols": categorical_cols
+        }
+
+
+# -----------------------------------------------
+# POST / GET — Exact values for an approximate dashboard
+# -----------------------------------------------
 
-    # Schema
+@router.post("/dashboard/{table_name}/exact", status_code=202)
+async def request_exact_upgrade(table_name: str):
+    """
+    Starts the exact recomputation (full scans, no statement timeout),
+    or returns the job already running for this table.
+    """
+    try:
+        validate_table_name(table_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if await touch_table_async(table_name) == "rehydrating":
+        raise HTTPException(status_code=409, detail="Table is being restored, try again shortly")
+    try:
+        schema = await get_table_schema_async(table_name)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return start_exact_upgrade(table_name, column_roles(schema))
+
+
+@router.get("/dashboard/{table_name}/exact/{job_id}")
+def get_exact_upgrade(table_name: str, job_id: str):
+    """
+    Status of an exact recomputation; once "complete" it holds the
+    exact total_rows, metrics, bar_chart and line_chart.
+    """
+    evict_finished_upgrades()
+    job = EXACT_JOBS.get(job_id)
+    if job is None or job["table_name"] != table_name:
+        raise HTTPException(status_code=404, detail=f"Unknown upgrade job: {job_id}")
+    return {key: value for key, value in job.items() if key not in ("task", "finished_at")}
+
+
+def start_exact_upgrade(table_name: str, roles: dict) -> dict:
+    evict_finished_upgrades()
+    # Runs on the event loop, so check-then-insert can't interleave
+    for job in EXACT_JOBS.values():
+        if job["table_name"] == table_name and job["status"] == "running":
+            return {"job_id": job["job_id"], "status": "running"}
+
+    job_id = str(uuid.uuid4())
+    job = {"job_id": job_id, "table_name": table_name, "status": "running",
+           "total_rows": None, "metrics": None, "bar_chart": None, "line_chart": None, "error": None,
+           "finished_at": None}
+    EXACT_JOBS[job_id] = job
+    # Holding the task keeps it from being garbage collected mid-run
+    job["task"] = asyncio.create_task(run_exact_upgrade(job, roles))
+    return {"job_id": job_id, "status": "running"}
+
+
+async def run_exact_upgrade(job: dict, roles: dict) -> None:
+    table_name, numeric_cols = job["table_name"], roles["numeric"]
     try:
-        schema = get_table_schema(table_name)
+        with span("dashboard.exact_upgrade", table=table_name):
+            # Full scans of the tables approx mode is for: no statement timeout
+            count, job["metrics"], job["bar_chart"], job["line_chart"] = await asyncio.gather(
+                run_query_async(f"SELECT COUNT(*) AS n FROM {quote_ident(table_name)}", timeout_ms=0),
+                fetch_metrics(table_name, numeric_cols, timeout_ms=0),
+                fetch_grouped_sum(table_name, roles["categorical"][:1], numeric_cols[:1], timeout_ms=0),
+                fetch_grouped_sum(table_name, roles["date"][:1], numeric_cols[:1], timeout_ms=0),
+            )
+        job["total_rows"] = int(count["n"].iloc[0])
+        job["status"] = "complete"
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Schema fetch failed: {e}")
+        print(f"⚠️ Exact dashboard for '{table_name}' failed: {e}")
+        job["status"], job["error"] = "failed", str(e)
+    finally:
+        job["finished_at"] = time.time()
 
-    # Identify column types
-    numeric_cols = df.select_dtypes(include="number").columns.tolist()
-    categorical_cols = df.select_dtypes(include="object").columns.tolist()
-    date_cols = df.select_dtypes(include=["datetime", "datetimetz"]).columns.tolist()
 
-    # Key metrics
-    # Key metrics
-    metrics = {}
-    for col in numeric_cols:
-        metrics[col] = {
-            "sum": convert_numpy(round(float(df[col].sum()), 2)),
-            "mean": convert_numpy(round(float(df[col].mean()), 2)),
-            "min": convert_numpy(round(float(df[col].min()), 2)),
-            "max": convert_numpy(round(float(df[col].max()), 2))
-        }
+def evict_finished_upgrades() -> None:
+    """Drops jobs that finished more than EXACT_JOB_TTL_S ago."""
+    cutoff = time.time() - EXACT_JOB_TTL_S
+    for job_id in [j for j, job in EXACT_JOBS.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+        del EXACT_JOBS[job_id]
+
+
+# -----------------------------------------------
+# HELPERS — SQL aggregates for metrics and charts
+# -----------------------------------------------
+
+def column_roles(schema: dict) -> dict:
+    """
+    Splits columns into numeric / categorical (text) / date by their
+    PostgreSQL type.
+    """
+    roles = {"numeric": [], "categorical": [], "date": []}
+    for col in schema["columns"]:
+        sql_type = col["type"].upper()
+        if sql_type.startswith(NUMERIC_TYPES):
+            roles["numeric"].append(col["name"])
+        elif sql_type.startswith(DATE_TYPES):
+            roles["date"].append(col["name"])
+        elif sql_type.startswith(TEXT_TYPES):
+            roles["categorical"].append(col["name"])
+    return roles
+
+
+async def fetch_metrics(table_name: str, numeric_cols: list, timeout_ms: int = None) -> dict:
+    """
+    Sum / mean / min / max of every numeric column in one scan.
+    Sums are cast to double precision so BIGINT columns can't overflow
+    into NUMERIC, and are 0 (not NULL) for all-empty columns.
+    """
+    if not numeric_cols:
+        return {}
+
+    selects = []
+    for i, col in enumerate(numeric_cols):
+        c = quote_ident(col)
+        selects += [
+            f"COALESCE(SUM({c}::double precision), 0) AS sum_{i}",
+            f"AVG({c}::double precision) AS mean_{i}",
+            f"MIN({c})::double precision AS min_{i}",
+            f"MAX({c})::double precision AS max_{i}",
+        ]
+    row = (await run_query_async(
+        f"SELECT {', '.join(selects)} FROM {quote_ident(table_name)}", timeout_ms=timeout_ms
+    )).iloc[0]
 
-    # Chart data — bar chart
-    bar_chart = None
-    if categorical_cols and numeric_cols:
-        cat, num = categorical_cols[0], numeric_cols[0]
-        grouped = df.groupby(cat)[num].sum().reset_index()
-        bar_chart = {
-            "labels": grouped[cat].tolist(),
-            "values": [convert_numpy(v) for v in grouped[num].tolist()],
-            "x_label": cat,
-            "y_label": num
+    return {
+        col: {
+            stat: None if pd.isna(row[f"{stat}_{i}"]) else round(float(row[f"{stat}_{i}"]), 2)
+            for stat in ("sum", "mean", "min", "max")
         }
+        for i, col in enumerate(numeric_cols)
+    }
+
+
+async def fetch_grouped_sum(table_name: str, group_cols: list, value_cols: list,
+                            timeout_ms: int = None) -> dict:
+    """
+    SUM(value) per distinct group value, for the bar and line charts.
+    Empty group values are left out, as in a pandas groupby.
+    """
+    if not group_cols or not value_cols:
+        return None
+
+    group, value = quote_ident(group_cols[0]), quote_ident(value_cols[0])
+    grouped = await run_query_async(f"""
+        SELECT {group}::text AS label, COALESCE(SUM({value}::double precision), 0) AS value
+        FROM {quote_ident(table_name)}
+        WHERE {group} IS NOT NULL
+        GROUP BY {group}
+        ORDER BY {group}
+    """, timeout_ms=timeout_ms)
+    return {
+        "labels": grouped["label"].tolist(),
+        "values": [convert_numpy(v) for v in grouped["value"].tolist()],
+        "x_label": group_cols[0],
+        "y_label": value_cols[0]
+    }
+
+
+async def fetch_sample(table_name: str, total_rows: int) -> pd.DataFrame:
+    """
+    Rows for the AI insights: the whole table if small, otherwise a
+    random sample of PROFILE_MAX_ROWS (what insights profiles anyway).
+    """
+    sql = f"SELECT * FROM {quote_ident(table_name)}"
+    if total_rows > PROFILE_MAX_ROWS:
+        sql += f" ORDER BY random() LIMIT {PROFILE_MAX_ROWS}"
+    return await run_query_async(sql)
+
+
+# -----------------------------------------------
+# APPROXIMATE — Sampled aggregates with confidence intervals
+# -----------------------------------------------
+#
+# Each page (SYSTEM) or row (BERNOULLI) is in the sample independently
+# with probability f, so a total is estimated as sum(t_u) / f over the
+# sampled units u, with variance (1 - f) / f² · sum(t_u²) (Horvitz-
+# Thompson). Working per page keeps the intervals honest when similar
+# rows sit together, e.g. a file that was sorted before upload.
+
+async def estimate_rows(table_name: str):
+    """
+    Planner row estimate from pg_class, or None if the table has never
+    been analyzed (autovacuum does it shortly after a load).
+    """
+    result = await run_query_async(
+        "SELECT reltuples::bigint AS n FROM pg_class WHERE oid = to_regclass(:name)",
+        {"name": f'public."{table_name}"'},
+    )
+    if result.empty or result["n"].iloc[0] <= 0:
+        return None
+    return int(result["n"].iloc[0])
+
+
+def sample_clause(estimated_rows: int) -> dict:
+    """
+    TABLESAMPLE clause sized to hold about APPROX_SAMPLE_ROWS rows.
+    """
+    percent = min(100.0, 100.0 * APPROX_SAMPLE_ROWS / max(estimated_rows, 1))
+    return {
+        "method": APPROX_SAMPLE_METHOD,
+        "percent": round(percent, 6),
+        "fraction": percent / 100,
+        "unit": SAMPLE_UNITS[APPROX_SAMPLE_METHOD],
+        "sql": f"TABLESAMPLE {APPROX_SAMPLE_METHOD} ({percent:.6f}) REPEATABLE ({APPROX_SEED})",
+    }
+
+
+def total_margin(sum_of_squares: float, fraction: float):
+    """
+    95% margin of error of an estimated total, from the sum of squared
+    per-unit totals.
+    """
+    if sum_of_squares is None or pd.isna(sum_of_squares):
+        return None
+    return APPROX_Z * math.sqrt(max(sum_of_squares, 0.0) * (1 - fraction)) / fraction
 
-    # Chart data — line chart
-    line_chart = None
-    if date_cols and numeric_cols:
-        date_col = date_cols[0]
-        num_col = numeric_cols[0]
-        df[date_col] = df[date_col].astype(str)
-        line_data = df.groupby(date_col)[num_col].sum().reset_index()
-        line_chart = {
-            "labels": line_data[date_col].tolist(),
-            "values": [convert_numpy(v) for v in line_data[num_col].tolist()],
-            "x_label": date_col,
-            "y_label": num_col
+
+def round_or_none(value):
+    return None if value is None or pd.isna(value) else round(float(value), 2)
+
+
+async def fetch_metrics_approx(table_name: str, numeric_cols: list, sample: dict) -> tuple:
+    """
+    fetch_metrics on a sample: returns (metrics, estimated row count,
+    its margin). Each metric carries "ci", the ± 95% margin of its sum
+    and mean. min / max are the sample's own extremes and have no
+    interval (the true ones are at least as far out).
+    """
+    unit_selects, selects = ["COUNT(*) AS n"], ["SUM(n) AS n", "SUM(n * n) AS nn"]
+    for i, col in enumerate(numeric_cols):
+        c = quote_ident(col)
+        unit_selects += [
+            f"COALESCE(SUM({c}::double precision), 0) AS t_{i}",
+            f"COUNT({c}) AS k_{i}",
+            f"MIN({c})::double precision AS min_{i}",
+            f"MAX({c})::double precision AS max_{i}",
+        ]
+        selects += [
+            f"SUM(t_{i}) AS t_{i}", f"SUM(t_{i} * t_{i}) AS tt_{i}",
+            f"SUM(k_{i}) AS k_{i}", f"SUM(k_{i} * k_{i}) AS kk_{i}", f"SUM(t_{i} * k_{i}) AS tk_{i}",
+            f"MIN(min_{i}) AS min_{i}", f"MAX(max_{i}) AS max_{i}",
+        ]
+    row = (await run_query_async(f"""
+        SELECT {', '.join(selects)}
+        FROM (
+            SELECT {', '.join(unit_selects)}
+            FROM {quote_ident(table_name)} {sample['sql']}
+            GROUP BY {sample['unit']}
+        ) units
+    """)).iloc[0].map(lambda v: None if pd.isna(v) else float(v))
+
+    f = sample["fraction"]
+    metrics = {}
+    for i, col in enumerate(numeric_cols):
+        total, count = row[f"t_{i}"] or 0.0, row[f"k_{i}"] or 0.0
+        mean = mean_margin = None
+        if count:
+            # Ratio estimator: residuals t_u - mean·k_u, linearised
+            mean = total / count
+            residual = row[f"tt_{i}"] - 2 * mean * row[f"tk_{i}"] + mean * mean * row[f"kk_{i}"]
+            mean_margin = total_margin(residual, f) / (count / f)
+        metrics[col] = {
+            "sum": round_or_none(total / f),
+            "mean": round_or_none(mean),
+            "min": round_or_none(row[f"min_{i}"]),
+            "max": round_or_none(row[f"max_{i}"]),
+            "ci": {"sum": round_or_none(total_margin(row[f"tt_{i}"], f)), "mean": round_or_none(mean_margin)},
         }
 
-    # Raw data (first 100 rows for preview)
-    raw_data = df.head(100).fillna("").to_dict(orient="records")
+    rows = row["n"] or 0.0
+    return metrics, int(round(rows / f)), round_or_none(total_margin(row["nn"], f))
+
 
-    # AI Insights
-    insights = generate_insights(df, table_name)
+async def fetch_grouped_sum_approx(table_name: str, group_cols: list, value_cols: list, sample: dict) -> dict:
+    """
+    fetch_grouped_sum on a sample, with "ci" holding the ± 95% margin
+    of each value. Rare groups can be missing from the sample.
+    """
+    if not group_cols or not value_cols:
+        return None
 
+    group, value = quote_ident(group_cols[0]), quote_ident(value_cols[0])
+    grouped = await run_query_async(f"""
+        SELECT grp::text AS label, SUM(t) AS value, SUM(t * t) AS tt
+        FROM (
+            SELECT {group} AS grp, COALESCE(SUM({value}::double precision), 0) AS t
+            FROM {quote_ident(table_name)} {sample['sql']}
+            WHERE {group} IS NOT NULL
+            GROUP BY {sample['unit']}, {group}
+        ) units
+        GROUP BY grp
+        ORDER BY grp
+    """)
+    f = sample["fraction"]
     return {
-        "table_name": table_name,
-        "schema": schema,
-        "metrics": metrics,
-        "bar_chart": bar_chart,
-        "line_chart": line_chart,
-        "raw_data": raw_data,
-        "insights": insights,
-        "numeric_cols": numeric_cols,
-        "categorical_cols": categorical_cols
-    }
\ No newline at end of file
+        "labels": grouped["label"].tolist(),
+        "values": [float(v) / f for v in grouped["value"]],
+        "ci": [round_or_none(total_margin(float(tt), f)) for tt in grouped["tt"]],
+        "x_label": group_cols[0],
+        "y_label": value_cols[0]
+    }
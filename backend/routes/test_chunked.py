@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+
+class FakeLoader:
+    """Collects the frames the stream would load into PostgreSQL."""
+    aborted = []
+
+    def __init__(self, file_name):
+        self.upload_id = f"upload-{file_name}"
+        self.frames = []
+        self.rows = 0
+
+    def append(self, df):
+        self.frames.append(df)
+        self.rows += len(df)
+
+    def state(self):
+        return {"upload_id": self.upload_id}
+
+    def abort(self):
+        FakeLoader.aborted.append(self.upload_id)
+
+    @classmethod
+    def abort_saved(cls, state):
+        cls.aborted.append(state["upload_id"])
+
+
+@pytest.fixture
+def chunked(tmp_path, monkeypatch):
+    # routes.upload creates ../../uploads relative to the working directory
+    workdir = tmp_path / "app" / "backend"
+    workdir.mkdir(parents=True)
+    monkeypatch.chdir(workdir)
+    from routes import chunked
+
+    monkeypatch.setattr(chunked, "SESSION_DIR", str(tmp_path / "sessions"))
+    monkeypatch.setattr(chunked, "StreamingTableLoader", FakeLoader)
+    monkeypatch.setattr(chunked, "SESSIONS", {})
+    monkeypatch.setattr(FakeLoader, "aborted", [])
+    return chunked
+
+
+# -----------------------------------------------
+# RANGES
+# -----------------------------------------------
+
+def test_merge_ranges(chunked):
+    assert chunked.merge_ranges([[20, 30], [0, 10], [10, 15], [25, 40]]) == [[0, 15], [20, 40]]
+    assert chunked.merge_ranges([]) == []
+
+
+# -----------------------------------------------
+# OUT-OF-ORDER CHUNKS — Streamed only once contiguous
+# -----------------------------------------------
+
+def test_out_of_order_chunks(chunked):
+    data = b"id,note\n" + b"".join(b'%d,"row\n%d"\n' % (i, i) for i in range(200))
+    size = 256
+    chunks = [(start, data[start:start + size]) for start in range(0, len(data), size)]
+    session = chunked.UploadSession.create("notes.csv", len(data), size)
+
+    # Last chunk first: nothing is contiguous from byte 0 yet
+    start, piece = chunks[-1]
+    session.write_chunk(start, piece)
+    chunked.advance_stream(session)
+    assert session.parsed_offset == 0
+    assert session.missing() == [[0, start]]
+
+    for start, piece in reversed(chunks[:-1]):
+        session.write_chunk(start, piece)
+        chunked.advance_stream(session)
+        assert session.parsed_offset == session.contiguous_end()
+
+    assert session.missing() == []
+    assert session.parsed_offset == len(data)
+    tail = session.parser.close()
+    frames = session.loader.frames + ([tail] if tail is not None else [])
+    result = pd.concat(frames, ignore_index=True)
+    assert result["id"].tolist() == [str(i) for i in range(200)]
+    assert result["note"].iloc[7] == "row\n7"
+    with open(session.data_path, "rb") as f:
+        assert hashlib.sha256(f.read()).hexdigest() == hashlib.sha256(data).hexdigest()
+
+
+# -----------------------------------------------
+# PUT — Bodies longer than Content-Range are refused
+# -----------------------------------------------
+
+def client_for(chunked):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    app.include_router(chunked.router)
+    return TestClient(app)
+
+
+def test_oversized_chunk_rejected(chunked):
+    client = client_for(chunked)
+    session = chunked.UploadSession.create("notes.csv", 100, 10)
+    chunked.SESSIONS[session.session_id] = session
+    body = b"x" * 50
+    headers = {"Content-Range": "bytes 0-9/100", "X-Chunk-SHA256": hashlib.sha256(body).hexdigest()}
+
+    # Declared length checked before the body is read
+    r = client.put(f"/upload/sessions/{session.session_id}", content=body, headers=headers)
+    assert r.status_code == 400
+
+    # No Content-Length (chunked transfer): cut off while streaming
+    r = client.put(f"/upload/sessions/{session.session_id}", content=iter([body[:8], body[8:]]), headers=headers)
+    assert r.status_code == 400
+    assert session.received == []
+
+
+def test_oversized_session_rejected(chunked, monkeypatch):
+    monkeypatch.setattr(chunked, "MAX_UPLOAD_BYTES", 1000)
+    client = client_for(chunked)
+
+    r = client.post("/upload/sessions", json={"file_name": "big.csv", "size": 1001})
+    assert r.status_code == 413
+    assert not os.path.exists(chunked.SESSION_DIR) or os.listdir(chunked.SESSION_DIR) == []
+    assert client.post("/upload/sessions", json={"file_name": "big.csv", "size": 1000}).status_code == 201
+
+
+# -----------------------------------------------
+# CLEANUP — Partial loads don't outlive a restart or an abandoned upload
+# -----------------------------------------------
+
+def streamed_session(chunked):
+    data = b"id,note\n" + b"".join(b"%d,row %d\n" % (i, i) for i in range(100))
+    session = chunked.UploadSession.create("notes.csv", len(data) + 100, 256)
+    chunked.SESSIONS[session.session_id] = session
+    session.write_chunk(0, data)
+    chunked.advance_stream(session)
+    assert session.loader is not None
+    return session
+
+
+def test_restart_aborts_saved_loader(chunked):
+    session = streamed_session(chunked)
+    chunked.SESSIONS.clear()  # a new process only has the files
+
+    reloaded = chunked.get_session(session.session_id)
+    assert FakeLoader.aborted == [session.loader.upload_id]
+    assert not reloaded.streaming and reloaded.loader is None
+    with open(reloaded.meta_path) as f:
+        assert json.load(f)["loader"] is None
+    assert reloaded.received == session.received
+
+
+@pytest.mark.parametrize("in_memory", [True, False])
+def test_abandoned_sessions_expire(chunked, in_memory):
+    session = streamed_session(chunked)
+    fresh = chunked.UploadSession.create("fresh.csv", 100, 10)
+    if not in_memory:
+        chunked.SESSIONS.clear()
+    old = time.time() - chunked.SESSION_TTL_S - 10
+    os.utime(session.meta_path, (old, old))
+
+    assert chunked.expire_sessions() == [session.session_id]
+    assert FakeLoader.aborted == [session.loader.upload_id]
+    assert not os.path.exists(session.dir)
+    assert session.session_id not in chunked.SESSIONS
+    assert os.path.exists(fresh.data_path)
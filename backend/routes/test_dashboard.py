@@ -0,0 +1,145 @@
+import asyncio
+import os
+import sys
+import time
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture
+def dashboard(tmp_path, monkeypatch):
+    # routes.upload creates ../../uploads relative to the working directory
+    workdir = tmp_path / "app" / "backend"
+    workdir.mkdir(parents=True)
+    monkeypatch.chdir(workdir)
+    from routes import dashboard
+
+    monkeypatch.setattr(dashboard, "EXACT_JOBS", {})
+    return dashboard
+
+
+# -----------------------------------------------
+# ESTIMATORS — 95% intervals cover the true value ~95% of the time
+# -----------------------------------------------
+
+def synthetic_table(seed=0, pages=2000, rows_per_page=40):
+    """Page-clustered values (pages differ in level), with some NULLs."""
+    rng = np.random.default_rng(seed)
+    page = np.repeat(np.arange(pages), rows_per_page)
+    value = rng.gamma(2.0, 50.0, size=page.size) + rng.normal(0, 40, size=pages)[page]
+    value[rng.random(page.size) < 0.1] = np.nan
+    return pd.DataFrame({"page": page, "v": value})
+
+
+def sampled_aggregates(table, fraction, seed):
+    """What fetch_metrics_approx's query returns for a page-level sample."""
+    rng = np.random.default_rng(seed)
+    pages = table["page"].unique()
+    sample = table[table["page"].isin(pages[rng.random(pages.size) < fraction])]
+    units = sample.groupby("page").agg(n=("v", "size"), t=("v", "sum"), k=("v", "count"),
+                                       lo=("v", "min"), hi=("v", "max"))
+    return pd.DataFrame([{
+        "n": units["n"].sum(), "nn": (units["n"] ** 2).sum(),
+        "t_0": units["t"].sum(), "tt_0": (units["t"] ** 2).sum(),
+        "k_0": units["k"].sum(), "kk_0": (units["k"] ** 2).sum(), "tk_0": (units["t"] * units["k"]).sum(),
+        "min_0": units["lo"].min(), "max_0": units["hi"].max(),
+    }])
+
+
+def test_sum_mean_and_row_intervals_cover_known_totals(dashboard):
+    table = synthetic_table()
+    true_sum, true_mean, true_rows = table["v"].sum(), table["v"].mean(), len(table)
+    fraction, runs = 0.05, 200
+    sample = {"fraction": fraction, "unit": "page", "sql": ""}
+
+    covered = {"sum": 0, "mean": 0, "rows": 0}
+    for seed in range(runs):
+        with mock.patch.object(dashboard, "run_query_async",
+                               mock.AsyncMock(return_value=sampled_aggregates(table, fraction, seed))):
+            metrics, rows, rows_ci = asyncio.run(dashboard.fetch_metrics_approx("t", ["v"], sample))
+        v = metrics["v"]
+        covered["sum"] += abs(v["sum"] - true_sum) <= v["ci"]["sum"]
+        covered["mean"] += abs(v["mean"] - true_mean) <= v["ci"]["mean"]
+        covered["rows"] += abs(rows - true_rows) <= rows_ci
+
+    for name, hits in covered.items():
+        assert 0.90 <= hits / runs <= 0.99, f"{name} interval covered {hits}/{runs}"
+
+
+def test_total_margin_edge_cases(dashboard):
+    assert dashboard.total_margin(None, 0.1) is None
+    assert dashboard.total_margin(float("nan"), 0.1) is None
+    # A full scan has no sampling error
+    assert dashboard.total_margin(1e6, 1.0) == 0.0
+    assert dashboard.total_margin(100.0, 0.5) == pytest.approx(1.96 * np.sqrt(50.0) / 0.5)
+
+
+def test_sample_clause_fraction_matches_percent(dashboard):
+    clause = dashboard.sample_clause(10 * dashboard.APPROX_SAMPLE_ROWS)
+    assert clause["fraction"] == pytest.approx(0.1)
+    assert f"({clause['percent']:.6f})" in clause["sql"]
+    assert dashboard.sample_clause(10)["fraction"] == 1.0
+
+
+# -----------------------------------------------
+# EXACT JOBS — Finished jobs do not pile up in memory
+# -----------------------------------------------
+
+def exact_job(job_id, status="running", finished_at=None):
+    return {"job_id": job_id, "table_name": "sales", "status": status, "error": None,
+            "total_rows": 10, "metrics": {}, "bar_chart": None, "line_chart": None,
+            "finished_at": finished_at, "task": None}
+
+
+def test_finished_job_stays_fetchable_for_every_viewer(dashboard):
+    dashboard.EXACT_JOBS["a"] = exact_job("a", "complete", time.time())
+    for _ in range(2):
+        job = dashboard.get_exact_upgrade("sales", "a")
+        assert job["status"] == "complete" and "task" not in job
+    with pytest.raises(HTTPException):
+        dashboard.get_exact_upgrade("other", "a")
+
+
+def test_running_upgrade_is_shared_per_table(dashboard):
+    started = []
+
+    async def run_exact_upgrade(job, roles):
+        started.append(job["job_id"])
+        await asyncio.sleep(0)
+        job["status"], job["finished_at"] = "complete", time.time()
+
+    async def scenario():
+        first = dashboard.start_exact_upgrade("sales", {})
+        again = dashboard.start_exact_upgrade("sales", {})
+        other = dashboard.start_exact_upgrade("costs", {})
+        await asyncio.gather(*(job["task"] for job in dashboard.EXACT_JOBS.values()))
+        after = dashboard.start_exact_upgrade("sales", {})
+        await dashboard.EXACT_JOBS[after["job_id"]]["task"]
+        return first, again, other, after
+
+    with mock.patch.object(dashboard, "run_exact_upgrade", run_exact_upgrade):
+        first, again, other, after = asyncio.run(scenario())
+
+    assert again["job_id"] == first["job_id"]
+    assert other["job_id"] != first["job_id"]
+    # Once finished, asking again recomputes
+    assert after["job_id"] not in (first["job_id"], other["job_id"])
+    assert len(started) == 3
+
+
+def test_finished_jobs_expire(dashboard):
+    stale = time.time() - dashboard.EXACT_JOB_TTL_S - 1
+    dashboard.EXACT_JOBS.update({
+        "old": exact_job("old", "failed", stale),
+        "recent": exact_job("recent", "complete", time.time()),
+        "running": exact_job("running"),
+    })
+    dashboard.evict_finished_upgrades()
+    assert set(dashboard.EXACT_JOBS) == {"recent", "running"}
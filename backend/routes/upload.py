@@ -8,8 +8,9 @@ sys.path.insert(0, os.path.join(BASE_DIR, "layers/layer1_ingestion"))
 sys.path.insert(0, os.path.join(BASE_DIR, "layers/layer2_sql"))
 sys.path.insert(0, BASE_DIR)
 
-from ingestion import ingest_file
-from sql_engine import push_to_postgres
+from ingestion import ingest_file, ingest_arrow, is_arrow_format, get_extension, supported_extensions
+from sql_engine import push_to_postgres, push_arrow_to_postgres
+from utils.observability import span, profile_request
 
 router = APIRouter()
 
@@ -22,35 +23,55 @@ async def upload_file(file: UploadFile = File(...)):
     Accepts any file, runs it through Layer 1 + Layer 2,
     returns table metadata to the frontend.
     """
-    allowed_types = ["csv", "xlsx", "xls", "pdf", "png", "jpg", "jpeg"]
-    extension = file.filename.rsplit(".", 1)[-1].lower()
+    allowed_types = supported_extensions()
+    extension = get_extension(file.filename)
 
     if extension not in allowed_types:
         raise HTTPException(status_code=400, detail=f"Unsupported file type: {extension}")
 
-    # Save file temporarily
-    temp_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    with profile_request("upload"), span("upload", file_type=extension):
+        # Save file temporarily
+        temp_path = os.path.join(UPLOAD_DIR, file.filename)
+        with span("upload.save") as s, open(temp_path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+            s["bytes"] = buffer.tell()
+
+        metadata = load_file(temp_path, file.filename)
+
+    return {
+        "success": True,
+        "upload_id": metadata["upload_id"],
+        "table_name": metadata["table_name"],
+        "file_name": metadata["file_name"],
+        "rows": metadata["rows"],
+        "columns": metadata["columns"],
+        "column_names": metadata["column_names"],
+        "storage": metadata["storage"]
+    }
+
+
+# -----------------------------------------------
+# PIPELINE — Layer 1 + Layer 2 for one saved file
+# -----------------------------------------------
+
+def load_file(path: str, file_name: str) -> dict:
+    """
+    Ingests a saved file and loads it into PostgreSQL.
+    Parquet / Feather stay columnar end to end (COPY bulk load with their
+    own schema); everything else goes through the DataFrame pipeline.
+    """
+    arrow = is_arrow_format(path)
 
     # Layer 1 — Ingest
     try:
-        df = ingest_file(temp_path)
+        data = ingest_arrow(path) if arrow else ingest_file(path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ingestion failed: {e}")
 
     # Layer 2 — Push to PostgreSQL
     try:
-        metadata = push_to_postgres(df, file_name=file.filename)
+        if arrow:
+            return push_arrow_to_postgres(data, file_name=file_name)
+        return push_to_postgres(data, file_name=file_name)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
-
-    return {
-        "success": True,
-        "upload_id": metadata["upload_id"],
-        "table_name": metadata["table_name"],
-        "file_name": metadata["file_name"],
-        "rows": metadata["rows"],
-        "columns": metadata["columns"],
-        "column_names": metadata["column_names"]
-    }
\ No newline at end of file
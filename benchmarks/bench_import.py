@@ -0,0 +1,123 @@
+"""
+Measures how long it takes to import the backend app and how much
+memory the import costs, in a fresh interpreter each run.
+
+Usage (from the repo root):
+    python benchmarks/bench_import.py --repeat 5 --output import.json
+
+Writes the same JSON layout as run_pipeline.py, so the two files can be
+checked with benchmarks/compare.py.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BACKEND_DIR = os.path.join(BASE_DIR, "backend")
+
+# Runs inside the child interpreter and reports its own cost
+PROBE = """
+import resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+heavy = [m for m in ("torch", "easyocr", "pdfplumber", "google.generativeai") if m in sys.modules]
+print(elapsed, rss_kb, ",".join(heavy))
+"""
+
+TARGETS = {
+    "import_backend_main": ("main", BACKEND_DIR),
+    "import_ingestion": ("ingestion", os.path.join(BASE_DIR, "layers/layer1_ingestion")),
+}
+
+
+def measure(module: str, cwd: str) -> tuple:
+    """
+    Imports module in a fresh interpreter.
+    Returns (seconds, peak RSS in MB, heavy modules that got loaded).
+    """
+    output = subprocess.check_output(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        cwd=cwd, text=True,
+    )
+    elapsed, rss_kb, heavy = (output.splitlines()[-1].split(" ", 2) + [""])[:3]
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss_mb = int(rss_kb) / (1024 * 1024 if platform.system() == "Darwin" else 1024)
+    return float(elapsed), rss_mb, [m for m in heavy.split(",") if m]
+
+
+def top_imports(module: str, cwd: str, limit: int = 10) -> list:
+    """
+    Uses python -X importtime to list the slowest imports made
+    directly by the module.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        # "import time:   self_us |  cumulative_us |   name" — nesting adds indentation
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        if len(name) - len(name.lstrip()) != 3:
+            continue
+        rows.append({"module": name.strip(), "cumulative_ms": int(cumulative_us) / 1000})
+    rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+    return rows[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend import time")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_import.json")
+    args = parser.parse_args()
+
+    results = {}
+    for name, (module, cwd) in TARGETS.items():
+        runs, rss, heavy = [], [], []
+        for _ in range(args.repeat):
+            elapsed, rss_mb, heavy = measure(module, cwd)
+            runs.append(elapsed)
+            rss.append(rss_mb)
+        results[name] = {
+            "min_s": min(runs),
+            "median_s": statistics.median(runs),
+            "runs_s": runs,
+            "peak_rss_mb": max(rss),
+            "heavy_modules_loaded": heavy,
+            "slowest_imports": top_imports(module, cwd),
+        }
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "rows": 0,
+            "cols": 0,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    output = os.path.abspath(args.output)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name, r in results.items():
+        heavy = ", ".join(r["heavy_modules_loaded"]) or "none"
+        print(f"{name:<22} median {r['median_s']:.3f}s  peak RSS {r['peak_rss_mb']:.0f} MB  heavy: {heavy}")
+    print(f"✅ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
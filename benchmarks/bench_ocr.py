@@ -0,0 +1,148 @@
+"""
+Measures batched OCR throughput (pages per minute on CPU) on rendered
+table scans and checks how many cells come back correctly.
+
+Usage (from the repo root, needs easyocr installed):
+    python benchmarks/bench_ocr.py --pages 12 --rows 25 --cols 5 --output bench_ocr.json
+
+Pages are written as one multi-page TIFF at --dpi, so the downscale and
+tiling steps run exactly as they do for uploads. The JSON has the same
+shape as run_pipeline.py, so benchmarks/compare.py works on it.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(BASE_DIR, "layers/layer1_ingestion"))
+sys.path.insert(0, os.path.join(BASE_DIR, "benchmarks"))
+sys.path.insert(0, BASE_DIR)
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+import ocr
+from run_pipeline import git_commit
+
+
+# -----------------------------------------------
+# PAGES — Render a table onto blank scans
+# -----------------------------------------------
+
+def render_pages(pages: int, rows: int, cols: int, dpi: int, seed: int) -> tuple:
+    """
+    Returns (PIL pages, expected table as a list of rows). Every page
+    repeats the header, like a printed report.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    font = ImageFont.load_default(size=max(12, dpi // 8))
+    line_height = int(font.size * 2)
+    column_width = (width - dpi) // cols
+
+    header = [f"Field{c + 1}" for c in range(cols)]
+    expected = [header]
+    images = []
+
+    for _ in range(pages):
+        image = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(image)
+        page_rows = [header] + [
+            [str(v) for v in rng.integers(0, 100_000, size=cols)] for _ in range(rows)
+        ]
+        expected.extend(page_rows[1:])
+        for r, row in enumerate(page_rows):
+            y = dpi // 2 + r * line_height
+            for c, value in enumerate(row):
+                draw.text((dpi // 2 + c * column_width, y), value, fill=0, font=font)
+        images.append(image)
+
+    return images, expected
+
+
+def cell_accuracy(df, expected: list) -> float:
+    """
+    Share of expected body cells found at the same (row, column).
+    """
+    body = expected[1:]
+    got = df.astype(str).values.tolist()
+    total = len(body) * len(body[0])
+    hits = sum(
+        1
+        for r, row in enumerate(body) if r < len(got)
+        for c, value in enumerate(row) if c < len(got[r]) and got[r][c] == value
+    )
+    return hits / total if total else 0.0
+
+
+# -----------------------------------------------
+# MAIN
+# -----------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched OCR throughput")
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--rows", type=int, default=25)
+    parser.add_argument("--cols", type=int, default=5)
+    parser.add_argument("--dpi", type=int, default=300, help="resolution of the rendered scans")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--output", default="bench_ocr.json")
+    args = parser.parse_args()
+
+    images, expected = render_pages(args.pages, args.rows, args.cols, args.dpi, args.seed)
+
+    # Load the model outside the timed runs
+    ocr.get_ocr_reader()
+
+    runs, df = [], None
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scan.tiff")
+        images[0].save(path, save_all=True, append_images=images[1:], dpi=(args.dpi, args.dpi))
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            df = ocr.ocr_document(path)
+            runs.append(time.perf_counter() - start)
+
+    median = statistics.median(runs)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "pages": args.pages,
+            "rows_per_page": args.rows,
+            "cols": args.cols,
+            "scan_dpi": args.dpi,
+            "target_dpi": ocr.OCR_TARGET_DPI,
+            "tile_size": ocr.OCR_TILE_SIZE,
+            "batch_size": ocr.OCR_BATCH_SIZE,
+            "pages_per_minute": round(args.pages / median * 60, 1),
+            "cell_accuracy": round(cell_accuracy(df, expected), 4),
+        },
+        "results": {
+            "ocr_documents": {"min_s": min(runs), "median_s": median, "runs_s": runs},
+        },
+    }
+
+    output = os.path.abspath(args.output)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"ocr_documents        median {median:.2f}s  min {min(runs):.2f}s")
+    print(f"throughput           {report['meta']['pages_per_minute']} pages/min")
+    print(f"cell accuracy        {report['meta']['cell_accuracy']:.1%}")
+    print(f"✅ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Compares two benchmark result files and fails on regressions.
+
+Usage:
+    python benchmarks/compare.py baseline.json current.json --threshold 0.15
+
+Exits with status 1 if any stage's median time grew by more than the
+threshold (as a fraction of the baseline).
+"""
+
+import argparse
+import json
+import sys
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    Returns one row per stage present in both files:
+    (stage, baseline_s, current_s, change, regressed)
+    """
+    rows = []
+    for stage, base in baseline["results"].items():
+        if stage not in current["results"]:
+            continue
+        before = base["median_s"]
+        after = current["results"][stage]["median_s"]
+        change = (after - before) / before if before > 0 else 0.0
+        rows.append((stage, before, after, change, change > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed slowdown as a fraction, e.g. 0.15 = 15%%")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    if baseline["meta"]["rows"] != current["meta"]["rows"] or \
+            baseline["meta"]["cols"] != current["meta"]["cols"]:
+        print("⚠️ Runs used different dataset sizes, comparison may not be meaningful")
+
+    rows = compare_results(baseline, current, args.threshold)
+    for stage, before, after, change, regressed in rows:
+        flag = "❌ REGRESSION" if regressed else "✅"
+        print(f"{stage:<20} {before:.3f}s → {after:.3f}s  ({change:+.1%})  {flag}")
+
+    if any(row[4] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Times each stage of the upload and dashboard pipeline on a synthetic
+dataset and writes the results to JSON.
+
+Usage (from the repo root):
+    python benchmarks/run_pipeline.py --rows 100000 --cols 20 --output bench.json
+
+The database stages need DATABASE_URL (or --database-url) pointing at a
+local Postgres or a Postgres-compatible stand-in. They are skipped when
+neither is set. Compare two result files with benchmarks/compare.py.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BACKEND_DIR = os.path.join(BASE_DIR, "backend")
+sys.path.insert(0, os.path.join(BASE_DIR, "layers/layer1_ingestion"))
+sys.path.insert(0, os.path.join(BASE_DIR, "layers/layer2_sql"))
+sys.path.insert(0, os.path.join(BASE_DIR, "layers/layer3_dashboard"))
+sys.path.insert(0, os.path.join(BASE_DIR, "benchmarks"))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BASE_DIR)
+
+import pandas as pd
+from synthetic import generate_dataset, write_dataset
+
+
+# -----------------------------------------------
+# TIMER — Run a stage several times
+# -----------------------------------------------
+
+def time_stage(fn, repeat: int) -> dict:
+    """
+    Calls fn() repeat times and returns min / median / all run times.
+    fn must build its own fresh input so runs do not share state.
+    """
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {
+        "min_s": min(runs),
+        "median_s": statistics.median(runs),
+        "runs_s": runs,
+    }
+
+
+# -----------------------------------------------
+# STAGES — Layer 1 and Layer 2 without a database
+# -----------------------------------------------
+
+def bench_local_stages(csv_path: str, repeat: int) -> dict:
+    from ingestion import ingest_file, clean_dataframe
+    from sql_engine import infer_data_types
+
+    raw = pd.read_csv(csv_path)
+    cleaned = clean_dataframe(raw.copy())
+
+    return {
+        "ingest_file": time_stage(lambda: ingest_file(csv_path), repeat),
+        "clean_dataframe": time_stage(lambda: clean_dataframe(raw.copy()), repeat),
+        "infer_data_types": time_stage(lambda: infer_data_types(cleaned.copy()), repeat),
+    }
+
+
+# -----------------------------------------------
+# STAGES — Database load and dashboard API
+# -----------------------------------------------
+
+def bench_database_stages(csv_path: str, repeat: int, with_insights: bool) -> dict:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+    from ingestion import ingest_file
+    from sql_engine import push_to_postgres
+    from utils.database import get_engine
+
+    # routes/upload.py resolves its upload folder relative to the backend dir
+    os.chdir(BACKEND_DIR)
+    import main
+    import routes.dashboard as dashboard_route
+
+    if not with_insights:
+        # LLM latency is not reproducible, keep it out of the numbers
+        dashboard_route.generate_insights = lambda df, table_name, **kwargs: "(insights skipped)"
+
+    df = ingest_file(csv_path)
+    created = []
+
+    def push():
+        created.append(push_to_postgres(df.copy(), file_name="benchmark.csv"))
+
+    results = {"push_to_postgres": time_stage(push, repeat)}
+
+    table_name = created[-1]["table_name"]
+
+    # One client (and event loop) for every call, so the async pool is reused
+    with TestClient(main.app) as client:
+        def dashboard():
+            response = client.get(f"/api/dashboard/{table_name}")
+            response.raise_for_status()
+
+        results["get_dashboard"] = time_stage(dashboard, repeat)
+
+    # Clean up every table the benchmark created
+    with get_engine().connect() as conn:
+        for meta in created:
+            conn.execute(text(f'DROP TABLE IF EXISTS public."{meta["table_name"]}"'))
+            conn.execute(text("DELETE FROM uploads WHERE upload_id = :id"), {"id": meta["upload_id"]})
+        conn.commit()
+
+    return results
+
+
+# -----------------------------------------------
+# METADATA — What the numbers were measured on
+# -----------------------------------------------
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the DataMind pipeline")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--cols", type=int, default=20)
+    parser.add_argument("--dirty-ratio", type=float, default=0.05)
+    parser.add_argument("--date-formats", nargs="+", default=None,
+                        help="strftime formats mixed into date columns")
+    parser.add_argument("--type-mix", default=None,
+                        help='JSON weights, e.g. \'{"int": 1, "float": 1, "date": 1}\'')
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--with-insights", action="store_true",
+                        help="include the Gemini call in get_dashboard")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    use_database = bool(os.getenv("DATABASE_URL"))
+
+    type_mix = json.loads(args.type_mix) if args.type_mix else None
+    df = generate_dataset(args.rows, args.cols, type_mix, args.dirty_ratio,
+                          args.date_formats, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_dataset(df, os.path.join(tmp, "benchmark.csv"))
+        csv_bytes = os.path.getsize(csv_path)
+
+        results = bench_local_stages(csv_path, args.repeat)
+        if use_database:
+            results.update(bench_database_stages(csv_path, args.repeat, args.with_insights))
+        else:
+            print("⚠️ DATABASE_URL not set, skipping push_to_postgres and get_dashboard")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "rows": args.rows,
+            "cols": args.cols,
+            "dirty_ratio": args.dirty_ratio,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "csv_bytes": csv_bytes,
+        },
+        "results": results,
+    }
+
+    output = os.path.abspath(args.output)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for stage, timing in results.items():
+        print(f"{stage:<20} median {timing['median_s']:.3f}s  min {timing['min_s']:.3f}s")
+    print(f"✅ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
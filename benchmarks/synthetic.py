@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------
+# SYNTHETIC DATASETS — Reproducible benchmark input
+# -----------------------------------------------
+
+DEFAULT_TYPE_MIX = {
+    "int": 0.25,
+    "float": 0.25,
+    "category": 0.2,
+    "text": 0.1,
+    "date": 0.2,
+}
+
+DEFAULT_DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%b %d, %Y", "%Y-%m-%d %H:%M:%S"]
+
+CATEGORIES = ["North", "South", "East", "West", "Central", "Online", "Retail", "Wholesale"]
+NULL_TOKENS = ["", "N/A", "null", " "]
+
+
+def generate_dataset(rows: int = 100_000, cols: int = 20, type_mix: dict = None,
+                     dirty_ratio: float = 0.05, date_formats: list = None,
+                     seed: int = 42) -> pd.DataFrame:
+    """
+    Builds a DataFrame of strings that looks like a messy real-world export:
+    - Column types follow type_mix (int, float, category, text, date)
+    - dirty_ratio of cells get padding, null tokens or thousands separators
+    - Dates are written in a random mix of date_formats
+    The same arguments always produce the same data.
+    """
+    rng = np.random.default_rng(seed)
+    type_mix = type_mix or DEFAULT_TYPE_MIX
+    date_formats = date_formats or DEFAULT_DATE_FORMATS
+
+    kinds = list(type_mix)
+    weights = np.array([type_mix[k] for k in kinds], dtype=float)
+    column_kinds = rng.choice(kinds, size=cols, p=weights / weights.sum())
+
+    data = {}
+    for i, kind in enumerate(column_kinds):
+        name = f"{kind.title()} Col {i}"
+        values = generate_column(kind, rows, rng, date_formats)
+        data[name] = make_dirty(values, kind, dirty_ratio, rng)
+
+    return pd.DataFrame(data)
+
+
+def generate_column(kind: str, rows: int, rng: np.random.Generator,
+                    date_formats: list) -> np.ndarray:
+    if kind == "int":
+        return rng.integers(0, 10_000, size=rows).astype(str).astype(object)
+
+    if kind == "float":
+        return np.round(rng.normal(1_000, 250, size=rows), 2).astype(str).astype(object)
+
+    if kind == "category":
+        return rng.choice(CATEGORIES, size=rows).astype(object)
+
+    if kind == "text":
+        words = np.array(["alpha", "beta", "gamma", "delta", "omega", "sigma", "kappa"])
+        first = rng.choice(words, size=rows)
+        second = rng.integers(0, 1_000_000, size=rows).astype(str)
+        return np.char.add(np.char.add(first, "-"), second).astype(object)
+
+    if kind == "date":
+        start = np.datetime64("2020-01-01T00:00:00")
+        offsets = rng.integers(0, 4 * 365 * 24 * 3600, size=rows).astype("timedelta64[s]")
+        stamps = pd.Series(start + offsets)
+        fmt_index = rng.integers(0, len(date_formats), size=rows)
+        out = np.empty(rows, dtype=object)
+        for j, fmt in enumerate(date_formats):
+            mask = fmt_index == j
+            out[mask] = stamps[mask].dt.strftime(fmt).to_numpy()
+        return out
+
+    raise ValueError(f"Unknown column kind: {kind}")
+
+
+def make_dirty(values: np.ndarray, kind: str, dirty_ratio: float,
+               rng: np.random.Generator) -> np.ndarray:
+    """
+    Applies the kinds of mess clean_dataframe and infer_data_types
+    have to deal with: stray whitespace, null tokens and, for
+    numbers, thousands separators.
+    """
+    if dirty_ratio <= 0:
+        return values
+
+    values = values.copy()
+    rows = len(values)
+
+    padded = rng.random(rows) < dirty_ratio
+    values[padded] = np.char.add(np.char.add("  ", values[padded].astype(str)), " ")
+
+    nulls = rng.random(rows) < dirty_ratio / 2
+    values[nulls] = rng.choice(NULL_TOKENS, size=int(nulls.sum()))
+
+    if kind in ("int", "float"):
+        # A single formatted number is enough to keep the column as text
+        grouped = (rng.random(rows) < dirty_ratio / 10) & ~nulls
+        values[grouped] = [f"{float(v):,.2f}" for v in values[grouped]]
+
+    return values
+
+
+def write_dataset(df: pd.DataFrame, path: str) -> str:
+    df.to_csv(path, index=False)
+    return path
@@ -11,7 +11,110 @@ export const uploadFile = async (file) => {
   return res.data;
 };
 
-export const getDashboard = async (tableName) => {
-  const res = await API.get(`/dashboard/${tableName}`);
+export const getDashboard = async (tableName, params = {}) => {
+  const res = await API.get(`/dashboard/${tableName}`, { params });
   return res.data;
-};
\ No newline at end of file
+};
+
+// Starts (or joins) the exact recomputation of an approximate dashboard
+export const startExactDashboard = async (tableName) => {
+  const res = await API.post(`/dashboard/${tableName}/exact`);
+  return res.data;
+};
+
+export const getExactDashboard = async (tableName, jobId) => {
+  const res = await API.get(`/dashboard/${tableName}/exact/${jobId}`);
+  return res.data;
+};
+
+export const uploadBatch = async (files, combine = false) => {
+  const formData = new FormData();
+  files.forEach((file) => formData.append("files", file));
+  formData.append("combine", combine);
+  const res = await API.post("/upload/batch", formData);
+  return res.data;
+};
+
+export const getBatchStatus = async (batchId) => {
+  const res = await API.get(`/upload/batch/${batchId}`);
+  return res.data;
+};
+
+// -----------------------------------------------
+// Resumable chunked upload — for large files
+// -----------------------------------------------
+
+const CHUNK_SIZE = 8 * 1024 * 1024;
+const MAX_RETRIES = 5;
+
+const sha256Hex = async (buffer) => {
+  const digest = await crypto.subtle.digest("SHA-256", buffer);
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, "0"))
+    .join("");
+};
+
+const withRetry = async (fn) => {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await fn();
+    } catch (err) {
+      const status = err.response?.status;
+      // 4xx other than a checksum mismatch won't get better by retrying
+      if (attempt >= MAX_RETRIES || (status && status < 500 && status !== 422)) throw err;
+      await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** attempt));
+    }
+  }
+};
+
+const openSession = async (file, resumeKey) => {
+  const savedId = localStorage.getItem(resumeKey);
+  if (savedId) {
+    try {
+      const res = await API.get(`/upload/sessions/${savedId}`);
+      return res.data;
+    } catch {
+      localStorage.removeItem(resumeKey);
+    }
+  }
+  const res = await API.post("/upload/sessions", {
+    file_name: file.name,
+    size: file.size,
+    chunk_size: CHUNK_SIZE,
+  });
+  localStorage.setItem(resumeKey, res.data.session_id);
+  return res.data;
+};
+
+export const uploadFileResumable = async (file, onProgress) => {
+  // Same file picked again after a failure → continue where it stopped
+  const resumeKey = `datamind-upload:${file.name}:${file.size}:${file.lastModified}`;
+  const session = await openSession(file, resumeKey);
+  let sent = session.bytes_received;
+  onProgress?.(sent / file.size);
+
+  for (const [start, end] of session.missing) {
+    for (let offset = start; offset < end; offset += session.chunk_size) {
+      const stop = Math.min(offset + session.chunk_size, end);
+      const buffer = await file.slice(offset, stop).arrayBuffer();
+      const checksum = await sha256Hex(buffer);
+      await withRetry(() =>
+        API.put(`/upload/sessions/${session.session_id}`, buffer, {
+          headers: {
+            "Content-Type": "application/octet-stream",
+            "Content-Range": `bytes ${offset}-${stop - 1}/${file.size}`,
+            "X-Chunk-SHA256": checksum,
+          },
+        })
+      );
+      sent += stop - offset;
+      onProgress?.(sent / file.size);
+    }
+  }
+
+  const res = await withRetry(() =>
+    API.post(`/upload/sessions/${session.session_id}/finalize`, {})
+  );
+  localStorage.removeItem(resumeKey);
+  return res.data;
+};
@@ -6,12 +6,15 @@ import {
   Tooltip,
   ResponsiveContainer,
   CartesianGrid,
+  ErrorBar,
 } from "recharts";
 
 export default function BarChart({ data, xLabel, yLabel }) {
   const chartData = data.labels.map((label, i) => ({
     name: label,
     value: data.values[i],
+    // ± 95% margin when the values come from a sample
+    error: data.ci?.[i],
   }));
 
   return (
@@ -28,7 +31,9 @@ export default function BarChart({ data, xLabel, yLabel }) {
             contentStyle={{ backgroundColor: "#1F2937", border: "none", borderRadius: "8px" }}
             labelStyle={{ color: "#F9FAFB" }}
           />
-          <Bar dataKey="value" fill="#6366F1" radius={[4, 4, 0, 0]} />
+          <Bar dataKey="value" fill="#6366F1" radius={[4, 4, 0, 0]}>
+            {data.ci && <ErrorBar dataKey="error" stroke="#F9FAFB" width={4} />}
+          </Bar>
         </ReBarChart>
       </ResponsiveContainer>
     </div>
@@ -6,12 +6,15 @@ import {
   Tooltip,
   ResponsiveContainer,
   CartesianGrid,
+  ErrorBar,
 } from "recharts";
 
 export default function LineChart({ data, xLabel, yLabel }) {
   const chartData = data.labels.map((label, i) => ({
     name: label,
     value: data.values[i],
+    // ± 95% margin when the values come from a sample
+    error: data.ci?.[i],
   }));
 
   return (
@@ -34,7 +37,9 @@ export default function LineChart({ data, xLabel, yLabel }) {
             stroke="#10B981"
             strokeWidth={2}
             dot={{ fill: "#10B981" }}
-          />
+          >
+            {data.ci && <ErrorBar dataKey="error" stroke="#6EE7B7" width={4} />}
+          </Line>
         </ReLineChart>
       </ResponsiveContainer>
     </div>
@@ -1,11 +1,19 @@
-export default function MetricCard({ label, value, avg }) {
+export default function MetricCard({ label, value, avg, ci }) {
+  // ci holds ± 95% margins when the dashboard was computed from a sample
+  const approx = ci ? "≈ " : "";
   return (
     <div className="bg-gray-800 rounded-2xl p-5 border border-gray-700">
       <p className="text-gray-400 text-sm mb-1">{label}</p>
       <p className="text-white text-2xl font-bold">
-        {Number(value).toLocaleString()}
+        {approx}{Number(value).toLocaleString()}
+      </p>
+      {ci?.sum != null && (
+        <p className="text-gray-500 text-xs">± {Number(ci.sum).toLocaleString()}</p>
+      )}
+      <p className="text-gray-500 text-xs mt-1">
+        avg: {approx}{Number(avg).toLocaleString()}
+        {ci?.mean != null && ` ± ${Number(ci.mean).toLocaleString()}`}
       </p>
-      <p className="text-gray-500 text-xs mt-1">avg: {Number(avg).toLocaleString()}</p>
     </div>
   );
-}
\ No newline at end of file
+}
@@ -1,31 +1,107 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
-import { getDashboard } from "../api/client";
+import { getDashboard, getExactDashboard, startExactDashboard } from "../api/client";
 import MetricCard from "../components/MetricCard";
 import BarChart from "../components/BarChart";
 import LineChart from "../components/LineChart";
 import DataTable from "../components/DataTable";
 import InsightsCard from "../components/InsightsCard";
 
+const REHYDRATE_POLL_MS = 2000;
+const EXACT_POLL_MS = 2000;
+
 export default function Dashboard() {
   const { tableName } = useParams();
   const navigate = useNavigate();
   const [data, setData] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [rehydrating, setRehydrating] = useState(false);
+  const [upgrading, setUpgrading] = useState(false);
+  const exactTimer = useRef();
+  const currentTable = useRef(tableName);
+  currentTable.current = tableName;
 
   useEffect(() => {
-    getDashboard(tableName)
-      .then(setData)
-      .catch((err) => setError(err.message))
-      .finally(() => setLoading(false));
+    let cancelled = false;
+    let timer;
+
+    setUpgrading(false);
+
+    // Archived tables answer 202 while they are reloaded — poll until ready
+    const load = () => {
+      getDashboard(tableName)
+        .then((res) => {
+          if (cancelled) return;
+          if (res.status === "rehydrating") {
+            setRehydrating(true);
+            timer = setTimeout(load, REHYDRATE_POLL_MS);
+            return;
+          }
+          setData(res);
+          setLoading(false);
+        })
+        .catch((err) => {
+          if (cancelled) return;
+          setError(err.message);
+          setLoading(false);
+        });
+    };
+    load();
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+      clearTimeout(exactTimer.current);
+    };
   }, [tableName]);
 
+  // Large tables come back approximate. Exact values mean full scans,
+  // so they are only computed when asked for (viewers share one job)
+  const loadExact = () => {
+    const table = tableName;
+    const poll = (jobId) => {
+      getExactDashboard(table, jobId)
+        .then((job) => {
+          if (currentTable.current !== table) return;
+          if (job.status === "running") {
+            exactTimer.current = setTimeout(() => poll(jobId), EXACT_POLL_MS);
+            return;
+          }
+          setUpgrading(false);
+          if (job.status === "complete") {
+            setData((prev) => ({
+              ...prev,
+              mode: "exact",
+              sample: null,
+              total_rows: job.total_rows,
+              total_rows_ci: null,
+              metrics: job.metrics,
+              bar_chart: job.bar_chart,
+              line_chart: job.line_chart,
+            }));
+          }
+        })
+        .catch(() => setUpgrading(false));
+    };
+    setUpgrading(true);
+    startExactDashboard(table)
+      .then((job) => poll(job.job_id))
+      .catch(() => setUpgrading(false));
+  };
+
   if (loading) return (
     <div className="min-h-screen bg-gray-900 flex items-center justify-center">
       <div className="text-center">
         <div className="animate-spin text-5xl mb-4">⚙️</div>
-        <p className="text-gray-400 text-lg">Building your dashboard...</p>
+        <p className="text-gray-400 text-lg">
+          {rehydrating ? "Restoring archived table..." : "Building your dashboard..."}
+        </p>
+        {rehydrating && (
+          <p className="text-gray-500 text-sm mt-2">
+            This table wasn't opened for a while and is being reloaded.
+          </p>
+        )}
       </div>
     </div>
   );
@@ -55,6 +131,21 @@ export default function Dashboard() {
         </button>
       </div>
 
+      {/* Approximate values banner */}
+      {data.mode === "approx" && (
+        <div className="bg-gray-800 border border-amber-500/40 text-amber-300 text-sm rounded-xl px-4 py-3 mb-6">
+          ≈ Computed from a {Number(data.sample.percent).toPrecision(2)}% sample of ~
+          {Number(data.total_rows).toLocaleString()} rows, ± shows 95% confidence intervals.
+          <button
+            onClick={loadExact}
+            disabled={upgrading}
+            className="ml-3 underline hover:text-amber-200 disabled:no-underline disabled:opacity-70"
+          >
+            {upgrading ? "Computing exact values..." : "Exact values"}
+          </button>
+        </div>
+      )}
+
       {/* Metrics */}
       {data.metrics && (
         <div className="grid grid-cols-2 md:grid-cols-4 gap-4 mb-8">
@@ -64,6 +155,7 @@ export default function Dashboard() {
               label={key.replace(/_/g, " ").toUpperCase()}
               value={val.sum}
               avg={val.mean}
+              ci={val.ci}
             />
           ))}
         </div>
@@ -1,18 +1,28 @@
 import { useState } from "react";
 import { useNavigate } from "react-router-dom";
-import { uploadFile } from "../api/client";
+import { uploadFile, uploadFileResumable, uploadBatch, getBatchStatus } from "../api/client";
+
+const POLL_INTERVAL_MS = 1000;
+// Larger files go through the resumable chunked upload
+const RESUMABLE_THRESHOLD = 50 * 1024 * 1024;
 
 export default function Home() {
   const [dragging, setDragging] = useState(false);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const [combine, setCombine] = useState(false);
+  const [batch, setBatch] = useState(null);
+  const [uploadProgress, setUploadProgress] = useState(null);
   const navigate = useNavigate();
 
   const handleFile = async (file) => {
     setLoading(true);
     setError(null);
+    setUploadProgress(null);
     try {
-      const data = await uploadFile(file);
+      const data = file.size > RESUMABLE_THRESHOLD
+        ? await uploadFileResumable(file, setUploadProgress)
+        : await uploadFile(file);
       navigate(`/dashboard/${data.table_name}`, { state: data });
     } catch (err) {
       setError(err.response?.data?.detail || "Upload failed. Try again.");
@@ -21,16 +31,48 @@ export default function Home() {
     }
   };
 
+  const handleBatch = async (files) => {
+    setLoading(true);
+    setError(null);
+    try {
+      let status = await uploadBatch(files, combine);
+      setBatch(status);
+      while (status.status !== "complete" && status.status !== "failed") {
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+        status = await getBatchStatus(status.batch_id);
+        setBatch(status);
+      }
+      if (status.status === "failed") {
+        setError(status.error || "Batch failed. Try again.");
+        return;
+      }
+      // One resulting table → go straight to its dashboard
+      if (status.tables.length === 1 && status.failed === 0) {
+        navigate(`/dashboard/${status.tables[0].table_name}`, { state: status.tables[0] });
+      }
+    } catch (err) {
+      setError(err.response?.data?.detail || "Upload failed. Try again.");
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const handleFiles = (fileList) => {
+    const files = Array.from(fileList);
+    if (files.length === 0) return;
+    const isZip = files[0].name.toLowerCase().endsWith(".zip");
+    if (files.length === 1 && !isZip) handleFile(files[0]);
+    else handleBatch(files);
+  };
+
   const onDrop = (e) => {
     e.preventDefault();
     setDragging(false);
-    const file = e.dataTransfer.files[0];
-    if (file) handleFile(file);
+    handleFiles(e.dataTransfer.files);
   };
 
   const onFileInput = (e) => {
-    const file = e.target.files[0];
-    if (file) handleFile(file);
+    handleFiles(e.target.files);
   };
 
   return (
@@ -54,23 +96,57 @@ export default function Home() {
       >
         <div className="text-5xl mb-4">📂</div>
         <p className="text-white text-lg font-medium mb-2">
-          Drag & drop your file here
+          Drag & drop your files here
         </p>
         <p className="text-gray-400 text-sm mb-6">
-          Supports CSV, Excel, PDF, PNG, JPG
+          Supports CSV, Excel, PDF, PNG, JPG, TIFF, Parquet, Feather, JSONL, CSV.gz — or several at once / a ZIP
         </p>
         <label className="cursor-pointer bg-indigo-600 hover:bg-indigo-500 text-white px-6 py-3 rounded-xl font-medium transition-all">
           Browse Files
-          <input type="file" className="hidden" onChange={onFileInput}
-            accept=".csv,.xlsx,.xls,.pdf,.png,.jpg,.jpeg" />
+          <input type="file" className="hidden" onChange={onFileInput} multiple
+            accept=".csv,.xlsx,.xls,.pdf,.png,.jpg,.jpeg,.tif,.tiff,.parquet,.feather,.arrow,.jsonl,.ndjson,.gz,.bz2,.zst,.zip" />
+        </label>
+        <label className="flex items-center justify-center gap-2 mt-6 text-gray-400 text-sm">
+          <input type="checkbox" checked={combine} onChange={(e) => setCombine(e.target.checked)} />
+          Combine files with the same columns into one table
         </label>
       </div>
 
+      {/* Batch progress */}
+      {batch && (
+        <div className="mt-8 bg-gray-800 border border-gray-700 rounded-xl p-5 max-w-lg w-full">
+          <div className="flex justify-between text-sm text-gray-300 mb-2">
+            <span>{batch.completed + batch.failed} / {batch.total} files</span>
+            <span>{Math.round(batch.progress * 100)}%</span>
+          </div>
+          <div className="w-full bg-gray-700 rounded-full h-2 mb-4">
+            <div className="bg-indigo-500 h-2 rounded-full transition-all"
+              style={{ width: `${batch.progress * 100}%` }} />
+          </div>
+          {Object.entries(batch.files).map(([name, f]) => (
+            <div key={name} className="flex justify-between text-sm py-1">
+              <span className="text-gray-300 truncate mr-4">{name}</span>
+              {f.status === "ready" ? (
+                <button onClick={() => navigate(`/dashboard/${f.table_name}`)}
+                  className="text-indigo-400 hover:text-indigo-300">open →</button>
+              ) : (
+                <span className={f.status === "failed" ? "text-red-400" : "text-gray-500"}
+                  title={f.error || ""}>{f.status}</span>
+              )}
+            </div>
+          ))}
+        </div>
+      )}
+
       {/* Loading */}
       {loading && (
         <div className="mt-8 text-center">
           <div className="animate-spin text-4xl mb-3">⚙️</div>
-          <p className="text-gray-400">Processing your file...</p>
+          <p className="text-gray-400">
+            {uploadProgress !== null && uploadProgress < 1
+              ? `Uploading... ${Math.round(uploadProgress * 100)}%`
+              : "Processing your file..."}
+          </p>
         </div>
       )}
 
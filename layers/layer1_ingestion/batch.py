@@ -0,0 +1,211 @@
+import multiprocessing
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.insert(0, BASE_DIR)
+
+from ingestion import ingest_file, get_extension, get_ocr_reader, supported_extensions
+from ocr import ocr_documents
+from utils.observability import span
+
+# -----------------------------------------------
+# CONFIG
+# -----------------------------------------------
+
+# OCR workers each hold an EasyOCR model (~hundreds of MB), keep them few
+OCR_WORKERS = int(os.getenv("BATCH_OCR_WORKERS", "1"))
+TABULAR_WORKERS = int(os.getenv("BATCH_TABULAR_WORKERS", str(os.cpu_count() or 2)))
+
+# Scanned files sent to an OCR worker per task; their pages share recognition batches
+OCR_FILES_PER_TASK = int(os.getenv("BATCH_OCR_FILES_PER_TASK", "8"))
+
+OCR_EXTENSIONS = {"png", "jpg", "jpeg", "tif", "tiff"}
+ARCHIVE_EXTENSIONS = {"zip"}
+
+# Limits per archive, checked before anything is extracted (zip bombs)
+ZIP_MAX_MEMBERS = int(os.getenv("BATCH_ZIP_MAX_MEMBERS", "1000"))
+ZIP_MAX_BYTES = int(os.getenv("BATCH_ZIP_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# One long-lived pool per format kind, so warm workers are reused across batches
+_pools = {}
+
+
+# -----------------------------------------------
+# WORKER POOLS — Format-specific, created on first use
+# -----------------------------------------------
+
+def format_kind(file_path: str) -> str:
+    return "ocr" if get_extension(file_path) in OCR_EXTENSIONS else "tabular"
+
+
+def _warm_ocr_worker():
+    # Runs once per OCR worker process: load the model before the first file
+    get_ocr_reader()
+
+
+def get_pool(kind: str) -> ProcessPoolExecutor:
+    """
+    Returns the shared process pool for a format kind.
+    Workers are spawned (not forked) so they never inherit the API
+    process's threads or open database sockets.
+    """
+    if kind not in _pools:
+        context = multiprocessing.get_context("spawn")
+        if kind == "ocr":
+            _pools[kind] = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS, mp_context=context, initializer=_warm_ocr_worker
+            )
+        else:
+            _pools[kind] = ProcessPoolExecutor(max_workers=TABULAR_WORKERS, mp_context=context)
+    return _pools[kind]
+
+
+def shutdown_pools() -> None:
+    for pool in _pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+    _pools.clear()
+
+
+# -----------------------------------------------
+# ARCHIVES — Expand ZIP uploads into plain files
+# -----------------------------------------------
+
+def expand_archives(paths: list, dest_dir: str) -> list:
+    """
+    Replaces every .zip in paths with the supported files inside it.
+    Nested folders are flattened (clashing names get a numeric suffix);
+    hidden files, macOS metadata and entries that would escape dest_dir
+    are skipped. Raises ValueError for archives over ZIP_MAX_MEMBERS
+    files or ZIP_MAX_BYTES uncompressed.
+    """
+    allowed = set(supported_extensions())
+    expanded = []
+
+    for path in paths:
+        if get_extension(path) not in ARCHIVE_EXTENSIONS:
+            expanded.append(path)
+            continue
+
+        archive_dir = unique_path(dest_dir, os.path.basename(path).rsplit(".", 1)[0])
+        os.makedirs(archive_dir)
+
+        with zipfile.ZipFile(path) as archive:
+            members = archive.infolist()
+            if len(members) > ZIP_MAX_MEMBERS:
+                raise ValueError(f"{os.path.basename(path)} has more than {ZIP_MAX_MEMBERS} entries")
+            if sum(member.file_size for member in members) > ZIP_MAX_BYTES:
+                raise ValueError(f"{os.path.basename(path)} expands to more than {ZIP_MAX_BYTES} bytes")
+
+            written = 0
+            for member in members:
+                name = os.path.basename(member.filename)
+                if member.is_dir() or not name or name.startswith(".") \
+                        or member.filename.startswith("__MACOSX/"):
+                    continue
+                if "." not in name or get_extension(name) not in allowed:
+                    continue
+
+                target = unique_path(archive_dir, name)
+                with archive.open(member) as source, open(target, "wb") as out:
+                    while chunk := source.read(1024 * 1024):
+                        # Sizes in the archive's directory can't be trusted on their own
+                        written += len(chunk)
+                        if written > ZIP_MAX_BYTES:
+                            raise ValueError(f"{os.path.basename(path)} expands to more than {ZIP_MAX_BYTES} bytes")
+                        out.write(chunk)
+                expanded.append(target)
+
+    return expanded
+
+
+def unique_path(directory: str, name: str) -> str:
+    """
+    directory/name, or directory/stem_N.ext if that is already taken.
+    """
+    target = os.path.join(directory, name)
+    stem, dot, ext = name.partition(".")
+    n = 1
+    while os.path.exists(target):
+        target = os.path.join(directory, f"{stem}_{n}{dot}{ext}")
+        n += 1
+    return target
+
+
+# -----------------------------------------------
+# MAIN — Ingest many files in parallel
+# -----------------------------------------------
+
+def ingest_batch(paths: list, on_progress=None) -> dict:
+    """
+    Fans files out to the OCR or tabular pool by format and returns
+    {path: DataFrame or Exception}. Scanned files go to the OCR pool in
+    groups of OCR_FILES_PER_TASK so their pages are recognised in
+    shared batches. on_progress(path, status, result) is called as each
+    file starts and finishes.
+    """
+    results = {}
+    futures = {}  # future → list of paths it covers
+
+    with span("batch.ingest", files=len(paths)) as s:
+        scans = [path for path in paths if format_kind(path) == "ocr"]
+        for i in range(0, len(scans), OCR_FILES_PER_TASK):
+            group = scans[i:i + OCR_FILES_PER_TASK]
+            futures[get_pool("ocr").submit(ocr_documents, group)] = group
+
+        for path in paths:
+            if format_kind(path) != "ocr":
+                futures[get_pool("tabular").submit(ingest_file, path)] = [path]
+
+        if on_progress:
+            for path in paths:
+                on_progress(path, "ingesting", None)
+
+        for future in as_completed(futures):
+            group = futures[future]
+            try:
+                result = future.result()
+                done = result if isinstance(result, dict) else {group[0]: result}
+            except Exception as e:
+                done = {path: e for path in group}
+
+            for path, result in done.items():
+                results[path] = result
+                if on_progress:
+                    failed = isinstance(result, Exception)
+                    on_progress(path, "failed" if failed else "ingested", result)
+
+        s["rows"] = sum(len(r) for r in results.values() if isinstance(r, pd.DataFrame))
+
+    return results
+
+
+# -----------------------------------------------
+# COMBINE — Merge files that share a schema
+# -----------------------------------------------
+
+def group_by_schema(frames: dict) -> list:
+    """
+    Groups {path: DataFrame} by identical column lists.
+    Returns a list of path lists, in first-seen order.
+    """
+    groups = {}
+    for path, df in frames.items():
+        groups.setdefault(tuple(df.columns), []).append(path)
+    return list(groups.values())
+
+
+def combine_frames(frames: dict, paths: list) -> pd.DataFrame:
+    """
+    Stacks the frames for paths into one, adding a source_file column
+    so rows can still be traced back to the file they came from.
+    """
+    parts = [
+        frames[path].assign(source_file=os.path.basename(path))
+        for path in paths
+    ]
+    return pd.concat(parts, ignore_index=True)
@@ -1,10 +1,41 @@
+import json
 import pandas as pd
-import pdfplumber
-import pytesseract
-from PIL import Image
-import easyocr
+from functools import lru_cache
 import os
-import re
+import sys
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.insert(0, BASE_DIR)
+
+from utils.observability import span
+
+# -----------------------------------------------
+# FORMAT REGISTRY — Extension → handler
+# -----------------------------------------------
+
+# Handlers import their heavy dependencies (pdfplumber, EasyOCR/torch)
+# on first call, so importing this module stays cheap.
+FORMAT_HANDLERS = {}
+
+
+def register_format(*extensions):
+    """
+    Registers a handler for one or more file extensions.
+    A handler takes a file path and returns a clean DataFrame.
+
+        @register_format("tsv")
+        def ingest_tsv(file_path): ...
+    """
+    def decorator(handler):
+        for extension in extensions:
+            FORMAT_HANDLERS[extension.lower()] = handler
+        return handler
+    return decorator
+
+
+def supported_extensions() -> list:
+    return sorted(FORMAT_HANDLERS)
+
 
 # -----------------------------------------------
 # MAIN FUNCTION — Entry point for all file types
@@ -13,41 +44,46 @@ import re
 def ingest_file(file_path: str) -> pd.DataFrame:
     """
     Accepts any file path and returns a clean Pandas DataFrame.
-    Supports: CSV, Excel, PDF, Image (PNG/JPG)
+    Dispatches on extension through FORMAT_HANDLERS.
     """
     extension = get_extension(file_path)
-
-    if extension == "csv":
-        return ingest_csv(file_path)
-    
-    elif extension in ["xlsx", "xls"]:
-        return ingest_excel(file_path)
-    
-    elif extension == "pdf":
-        return ingest_pdf(file_path)
-    
-    elif extension in ["png", "jpg", "jpeg"]:
-        return ingest_image(file_path)
-    
-    else:
+    handler = FORMAT_HANDLERS.get(extension)
+    if handler is None:
         raise ValueError(f"Unsupported file type: {extension}")
 
+    with span("ingest_file", format=extension, bytes=os.path.getsize(file_path)) as s:
+        df = handler(file_path)
+        s["rows"] = df.shape[0]
+        s["columns"] = df.shape[1]
+        return df
+
 
 # -----------------------------------------------
 # HELPER — Get file extension
 # -----------------------------------------------
 
+# Compression suffixes that are kept with the format: data.csv.gz → "csv.gz"
+COMPRESSION_EXTENSIONS = {"gz", "bz2", "zst"}
+
+
 def get_extension(file_path: str) -> str:
-    return file_path.rsplit(".", 1)[-1].lower()
+    parts = os.path.basename(file_path).lower().split(".")
+    if len(parts) > 2 and parts[-1] in COMPRESSION_EXTENSIONS:
+        return ".".join(parts[-2:])
+    return parts[-1]
 
 
 # -----------------------------------------------
 # LAYER 1A — CSV Ingestion
 # -----------------------------------------------
 
+@register_format("csv", "csv.gz", "csv.bz2", "csv.zst")
 def ingest_csv(file_path: str) -> pd.DataFrame:
+    # pandas picks the decompression from the suffix
     try:
-        df = pd.read_csv(file_path)
+        with span("ingest.parse", format="csv") as s:
+            df = pd.read_csv(file_path)
+            s["rows"] = len(df)
         df = clean_dataframe(df)
         print(f"[CSV] Loaded {df.shape[0]} rows x {df.shape[1]} columns")
         return df
@@ -59,10 +95,13 @@ def ingest_csv(file_path: str) -> pd.DataFrame:
 # LAYER 1B — Excel Ingestion
 # -----------------------------------------------
 
+@register_format("xlsx", "xls")
 def ingest_excel(file_path: str) -> pd.DataFrame:
     try:
         # Read first sheet by default
-        df = pd.read_excel(file_path, sheet_name=0)
+        with span("ingest.parse", format="excel") as s:
+            df = pd.read_excel(file_path, sheet_name=0)
+            s["rows"] = len(df)
         df = clean_dataframe(df)
         print(f"[Excel] Loaded {df.shape[0]} rows x {df.shape[1]} columns")
         return df
@@ -74,15 +113,19 @@ def ingest_excel(file_path: str) -> pd.DataFrame:
 # LAYER 1C — PDF Ingestion
 # -----------------------------------------------
 
+@register_format("pdf")
 def ingest_pdf(file_path: str) -> pd.DataFrame:
     """
     Extracts tables from PDF using pdfplumber.
     Falls back to text extraction if no tables found.
     """
     try:
+        import pdfplumber
+
         all_tables = []
 
-        with pdfplumber.open(file_path) as pdf:
+        with span("ingest.parse", format="pdf") as s, pdfplumber.open(file_path) as pdf:
+            s["pages"] = len(pdf.pages)
             for page_num, page in enumerate(pdf.pages):
                 tables = page.extract_tables()
                 
@@ -109,75 +152,172 @@ def ingest_pdf(file_path: str) -> pd.DataFrame:
 # LAYER 1D — Image Ingestion (OCR)
 # -----------------------------------------------
 
+@register_format("png", "jpg", "jpeg", "tif", "tiff")
 def ingest_image(file_path: str) -> pd.DataFrame:
     """
-    Uses EasyOCR to extract text from image,
-    then attempts to parse it into a DataFrame.
+    OCRs every page of an image (multi-page TIFFs included) with
+    EasyOCR and rebuilds the table from the text bounding boxes.
+    See ocr.py; batch uploads OCR many files together via ocr_documents.
     """
-    try:
-        reader = easyocr.Reader(['en'], gpu=False)
-        results = reader.readtext(file_path, detail=0)  # detail=0 = text only
-        
-        # Join all detected text
-        raw_text = "\n".join(results)
-        print(f"[Image OCR] Extracted text:\n{raw_text}\n")
+    from ocr import ocr_document
+    return ocr_document(file_path)
 
-        # Parse the text into a table structure
-        df = parse_text_to_dataframe(raw_text)
-        return clean_dataframe(df)
 
-    except Exception as e:
-        raise RuntimeError(f"Image ingestion failed: {e}")
+@lru_cache(maxsize=1)
+def get_ocr_reader():
+    """
+    Loads the EasyOCR model once per process, on first use.
+    Importing easyocr pulls in torch, so workers that never see
+    an image never pay for it.
+    """
+    with span("ingest.ocr_model_load"):
+        import easyocr
+        return easyocr.Reader(['en'], gpu=False)
 
 
 # -----------------------------------------------
-# PARSER — Convert raw OCR text → DataFrame
+# LAYER 1E — Arrow formats (Parquet, Feather/IPC)
 # -----------------------------------------------
 
-def parse_text_to_dataframe(raw_text: str) -> pd.DataFrame:
+# Extension → reader returning a pyarrow.Table. These formats carry their
+# own schema, so they skip pandas and infer_data_types. Schema-less
+# formats (CSV, JSONL) stay DataFrame handlers and get the same inference.
+ARROW_READERS = {}
+
+
+def register_arrow_format(*extensions):
     """
-    Tries to parse raw OCR text into a structured DataFrame.
-    Assumes first line = headers, remaining lines = rows.
+    Registers an Arrow reader. The format also becomes available to
+    ingest_file (converted to pandas) for callers that need a DataFrame.
     """
-    lines = [line.strip() for line in raw_text.strip().split("\n") if line.strip()]
+    def decorator(reader):
+        for extension in extensions:
+            ARROW_READERS[extension] = reader
+            FORMAT_HANDLERS[extension] = lambda file_path: ingest_arrow(file_path).to_pandas()
+        return reader
+    return decorator
 
-    if len(lines) < 2:
-        raise RuntimeError("Not enough data extracted from image to form a table.")
 
-    # Split each line by common delimiters
-    def split_line(line):
-        # Try tab, pipe, comma, or multiple spaces
-        for delimiter in ["\t", "|", ","]:
-            if delimiter in line:
-                return [cell.strip() for cell in line.split(delimiter)]
-        # fallback: split by 2+ spaces
-        return re.split(r'\s{2,}', line)
+def is_arrow_format(file_path: str) -> bool:
+    return get_extension(file_path) in ARROW_READERS
 
-    headers = split_line(lines[0])
-    rows = [split_line(line) for line in lines[1:]]
 
-    # Normalize row lengths
-    num_cols = len(headers)
-    normalized_rows = []
-    for row in rows:
-        if len(row) == num_cols:
-            normalized_rows.append(row)
-        elif len(row) < num_cols:
-            # Pad short rows
-            normalized_rows.append(row + [""] * (num_cols - len(row)))
-        else:
-            # Trim long rows
-            normalized_rows.append(row[:num_cols])
+def ingest_arrow(file_path: str):
+    """
+    Reads a file into a clean pyarrow.Table without per-cell Python work.
+    Uncompressed Parquet/Feather columns are memory-mapped, not copied.
+    """
+    extension = get_extension(file_path)
+    reader = ARROW_READERS.get(extension)
+    if reader is None:
+        raise ValueError(f"Unsupported file type: {extension}")
+
+    try:
+        with span("ingest_file", format=extension, bytes=os.path.getsize(file_path)) as s:
+            with span("ingest.parse", format=extension) as p:
+                table = reader(file_path)
+                p["rows"] = table.num_rows
+            table = clean_arrow_table(table)
+            s["rows"] = table.num_rows
+            s["columns"] = table.num_columns
+        print(f"[Arrow] Loaded {table.num_rows} rows x {table.num_columns} columns from .{extension}")
+        return table
+    except Exception as e:
+        raise RuntimeError(f"{extension} ingestion failed: {e}")
+
+
+@register_arrow_format("parquet", "pq")
+def read_parquet(file_path: str):
+    import pyarrow.parquet as pq
+    return pq.read_table(file_path, memory_map=True)
+
+
+@register_arrow_format("feather", "arrow", "ipc")
+def read_feather(file_path: str):
+    # Handles Feather v1/v2 and the Arrow IPC file format
+    import pyarrow.feather as feather
+    return feather.read_table(file_path, memory_map=True)
+
+
+def clean_arrow_table(table):
+    """
+    Arrow version of clean_dataframe, column-at-a-time in C++:
+    - Same column name rules
+    - Drops fully empty rows and columns
+    - Strips whitespace from string values
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    with span("clean_dataframe", rows=table.num_rows, columns=table.num_columns):
+        names = (
+            pd.Index(table.column_names)
+            .astype(str)
+            .str.strip()
+            .str.lower()
+            .str.replace(" ", "_")
+            .str.replace(r"[^\w]", "", regex=True)
+        )
+        table = table.rename_columns(list(names))
+
+        keep = [i for i in range(table.num_columns)
+                if table.column(i).null_count < table.num_rows]
+        table = table.select(keep)
+
+        columns = []
+        for column in table.columns:
+            if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+                column = pc.utf8_trim_whitespace(column)
+            columns.append(column)
+        table = pa.Table.from_arrays(columns, names=table.column_names)
+
+        if table.num_columns and table.num_rows:
+            has_value = pc.is_valid(table.column(0))
+            for column in table.columns[1:]:
+                has_value = pc.or_(has_value, pc.is_valid(column))
+            if pc.sum(has_value).as_py() < table.num_rows:
+                table = table.filter(has_value)
+
+        return table
+
+
+# -----------------------------------------------
+# LAYER 1F — JSON Lines
+# -----------------------------------------------
+
+@register_format("jsonl", "ndjson")
+def ingest_jsonl(file_path: str) -> pd.DataFrame:
+    """
+    Parses with PyArrow, then continues as a DataFrame so push_to_postgres
+    infers types as it does for CSV. Nested objects and arrays become
+    JSON text.
+    """
+    import pyarrow as pa
+    import pyarrow.json as pa_json
 
-    df = pd.DataFrame(normalized_rows, columns=headers)
-    return df
+    try:
+        with span("ingest.parse", format="jsonl") as s:
+            table = pa_json.read_json(file_path)
+            s["rows"] = table.num_rows
+        table = clean_arrow_table(table)
+        columns = [
+            pa.array([None if v is None else json.dumps(v, default=str) for v in column.to_pylist()],
+                     pa.string())
+            if pa.types.is_nested(column.type) else column
+            for column in table.columns
+        ]
+        df = pa.Table.from_arrays(columns, names=table.column_names).to_pandas()
+        print(f"[JSONL] Loaded {df.shape[0]} rows x {df.shape[1]} columns")
+        return df
+    except Exception as e:
+        raise RuntimeError(f"JSONL ingestion failed: {e}")
 
 
 # -----------------------------------------------
 # CLEANER — Standardize any DataFrame
 # -----------------------------------------------
 
-def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+def clean_dataframe(df: pd.DataFrame, drop_empty_columns: bool = True) -> pd.DataFrame:
     """
     Cleans and standardizes a DataFrame:
     - Strips whitespace from column names
@@ -185,7 +325,14 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     - Replaces spaces in column names with underscores
     - Drops fully empty rows and columns
     - Strips whitespace from string values
+    Pass drop_empty_columns=False when cleaning one chunk of a larger
+    file, so every chunk keeps the same columns.
     """
+    with span("clean_dataframe", rows=df.shape[0], columns=df.shape[1]):
+        return _clean_dataframe(df, drop_empty_columns)
+
+
+def _clean_dataframe(df: pd.DataFrame, drop_empty_columns: bool) -> pd.DataFrame:
     # Clean column names
     df.columns = (
         df.columns
@@ -198,7 +345,8 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
 
     # Drop completely empty rows and columns
     df.dropna(how="all", inplace=True)
-    df.dropna(axis=1, how="all", inplace=True)
+    if drop_empty_columns:
+        df.dropna(axis=1, how="all", inplace=True)
 
     # Strip whitespace from string cells
     df = df.map(lambda x: x.strip() if isinstance(x, str) else x)
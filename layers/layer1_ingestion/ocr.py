@@ -0,0 +1,265 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.insert(0, BASE_DIR)
+
+from ingestion import get_ocr_reader, clean_dataframe
+from utils.observability import span
+
+# -----------------------------------------------
+# CONFIG
+# -----------------------------------------------
+
+# Pages are downscaled (never upscaled) to this resolution before OCR.
+# 200 DPI keeps body text ~25-30 px tall, which EasyOCR reads fine.
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", "200"))
+
+# Assumed page width when a scan carries no DPI metadata (US Letter)
+ASSUMED_PAGE_WIDTH_IN = 8.5
+
+# Pages are cut into square tiles of this size (padded with white),
+# so every recognition batch has one shape
+OCR_TILE_SIZE = int(os.getenv("OCR_TILE_SIZE", "1600"))
+OCR_TILE_OVERLAP = int(os.getenv("OCR_TILE_OVERLAP", "160"))
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "8"))
+OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", "0.2"))
+
+# Gaps between box centres, as a share of the median text height,
+# that start a new row / column
+ROW_GAP_RATIO = 0.6
+COLUMN_GAP_RATIO = 0.5
+
+BOX_COLUMNS = ["page", "x0", "y0", "x1", "y1", "text", "conf"]
+
+
+# -----------------------------------------------
+# MAIN — Many scanned files → one DataFrame each
+# -----------------------------------------------
+
+def ocr_documents(paths: list) -> dict:
+    """
+    OCRs several images / multi-page TIFFs in one go. Pages from every
+    file are tiled and recognised together in fixed-size batches, then
+    each file's table is rebuilt from the text bounding boxes.
+    Returns {path: DataFrame or Exception}.
+    """
+    results = {}
+    pages = []  # (path, page image)
+
+    with span("ocr.batch", files=len(paths)) as s:
+        start = time.perf_counter()
+
+        with span("ocr.load_pages"):
+            for path in paths:
+                try:
+                    pages.extend((path, page) for page in load_pages(path))
+                except Exception as e:
+                    results[path] = RuntimeError(f"Image ingestion failed: {e}")
+
+        boxes = recognise(pages)
+
+        with span("ocr.cluster"):
+            page_paths = np.array([path for path, _ in pages], dtype=object)
+            for path in paths:
+                if path in results:
+                    continue
+                page_ids = np.flatnonzero(page_paths == path)
+                try:
+                    df = boxes_to_dataframe(boxes[boxes["page"].isin(page_ids)])
+                    results[path] = clean_dataframe(df)
+                except Exception as e:
+                    results[path] = RuntimeError(f"Image ingestion failed: {e}")
+
+        elapsed = time.perf_counter() - start
+        pages_per_minute = len(pages) / elapsed * 60 if elapsed else 0.0
+        s["pages"] = len(pages)
+        s["pages_per_minute"] = round(pages_per_minute, 1)
+        s["rows"] = sum(len(r) for r in results.values() if isinstance(r, pd.DataFrame))
+
+    print(f"[Image OCR] {len(pages)} pages from {len(paths)} files in {elapsed:.1f}s "
+          f"({pages_per_minute:.1f} pages/min)")
+    return results
+
+
+def ocr_document(path: str) -> pd.DataFrame:
+    result = ocr_documents([path])[path]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+# -----------------------------------------------
+# PAGES — Load, downscale, tile
+# -----------------------------------------------
+
+def load_pages(path: str) -> list:
+    """
+    Returns every page of an image file as a grayscale uint8 array,
+    downscaled to OCR_TARGET_DPI. Multi-page TIFFs give one per frame.
+    """
+    from PIL import Image, ImageSequence
+
+    pages = []
+    with Image.open(path) as image:
+        for frame in ImageSequence.Iterator(image):
+            page = frame.convert("L")
+            dpi = (frame.info.get("dpi") or (0,))[0] or page.width / ASSUMED_PAGE_WIDTH_IN
+            scale = OCR_TARGET_DPI / dpi
+            if scale < 1:
+                size = (max(1, round(page.width * scale)), max(1, round(page.height * scale)))
+                page = page.resize(size, Image.Resampling.LANCZOS)
+            pages.append(np.asarray(page))
+    return pages
+
+
+def tile_page(page: np.ndarray, tile_size: int = None, overlap: int = None) -> list:
+    """
+    Cuts a page into overlapping tile_size x tile_size tiles, padding
+    the edges with white. Returns [(tile, x offset, y offset)].
+    """
+    tile_size = tile_size or OCR_TILE_SIZE
+    overlap = OCR_TILE_OVERLAP if overlap is None else overlap
+    step = tile_size - overlap
+    height, width = page.shape
+
+    tiles = []
+    for y in range(0, max(height - overlap, 1), step):
+        for x in range(0, max(width - overlap, 1), step):
+            tile = np.full((tile_size, tile_size), 255, dtype=np.uint8)
+            part = page[y:y + tile_size, x:x + tile_size]
+            tile[:part.shape[0], :part.shape[1]] = part
+            tiles.append((tile, x, y))
+    return tiles
+
+
+# -----------------------------------------------
+# RECOGNITION — Batched EasyOCR with bounding boxes
+# -----------------------------------------------
+
+def recognise(pages: list) -> pd.DataFrame:
+    """
+    Runs detection + recognition over all tiles of all pages in
+    batches of OCR_BATCH_SIZE. Returns one row per text box in page
+    coordinates (see BOX_COLUMNS).
+    """
+    tiles = []  # (page index, tile, x offset, y offset)
+    for index, (_, page) in enumerate(pages):
+        tiles.extend((index, *tile) for tile in tile_page(page))
+
+    if not tiles:
+        return pd.DataFrame(columns=BOX_COLUMNS)
+
+    reader = get_ocr_reader()
+    with span("ocr.recognise", tiles=len(tiles)):
+        detections = reader.readtext_batched(
+            [tile for _, tile, _, _ in tiles],
+            n_width=OCR_TILE_SIZE,
+            n_height=OCR_TILE_SIZE,
+            batch_size=OCR_BATCH_SIZE,
+            detail=1,
+        )
+
+    records = []
+    for (index, _, x_offset, y_offset), found in zip(tiles, detections):
+        height, width = pages[index][1].shape
+        for box, text, conf in found:
+            if conf < OCR_MIN_CONFIDENCE or not str(text).strip():
+                continue
+            xs, ys = [p[0] for p in box], [p[1] for p in box]
+            centre = ((min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2)
+            if not owns(centre[0], x_offset, width) or not owns(centre[1], y_offset, height):
+                continue
+            records.append((index, x_offset + min(xs), y_offset + min(ys),
+                            x_offset + max(xs), y_offset + max(ys), str(text).strip(), conf))
+
+    return pd.DataFrame(records, columns=BOX_COLUMNS)
+
+
+def owns(centre: float, offset: int, extent: int) -> bool:
+    """
+    Neighbouring tiles split their overlap down the middle: a box is
+    kept by the tile whose half its centre (tile coordinates) lies in.
+    """
+    step = OCR_TILE_SIZE - OCR_TILE_OVERLAP
+    has_previous = offset > 0
+    has_next = offset + step < extent - OCR_TILE_OVERLAP
+    return (not has_previous or centre >= OCR_TILE_OVERLAP / 2) and \
+        (not has_next or centre < step + OCR_TILE_OVERLAP / 2)
+
+
+# -----------------------------------------------
+# LAYOUT — Bounding boxes → rows and columns
+# -----------------------------------------------
+
+def boxes_to_dataframe(boxes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rebuilds a table from text boxes. Each page is clustered on its
+    own; the first row is the header, and a header repeated at the
+    top of later pages is dropped.
+    """
+    rows = []
+    for _, page_boxes in boxes.groupby("page", sort=True):
+        rows.extend(cluster_cells(page_boxes))
+
+    if len(rows) < 2:
+        raise RuntimeError("Not enough data extracted from image to form a table.")
+
+    headers = [cell or f"column_{i + 1}" for i, cell in enumerate(rows[0])]
+    num_cols = len(headers)
+    body = [row for row in rows[1:] if row != rows[0]]
+    body = [(row + [""] * num_cols)[:num_cols] for row in body]
+    return pd.DataFrame(body, columns=headers)
+
+
+def cluster_cells(boxes: pd.DataFrame) -> list:
+    """
+    Groups one page's boxes into a grid, returned as a list of rows.
+    - Rows: sort by vertical centre, split where the gap to the previous
+      box exceeds ROW_GAP_RATIO x the median text height.
+    - Columns: from rows with 2+ boxes, sweep boxes left to right and
+      start a column where a box begins past everything seen so far.
+      Every box then goes to the column its centre falls in.
+    """
+    if boxes.empty:
+        return []
+
+    x0, x1 = boxes["x0"].to_numpy(float), boxes["x1"].to_numpy(float)
+    y0, y1 = boxes["y0"].to_numpy(float), boxes["y1"].to_numpy(float)
+    text = boxes["text"].to_numpy(object)
+    line_height = max(np.median(y1 - y0), 1.0)
+
+    # Rows
+    y_centre = (y0 + y1) / 2
+    order = np.argsort(y_centre, kind="stable")
+    new_row = np.diff(y_centre[order], prepend=y_centre[order][0]) > line_height * ROW_GAP_RATIO
+    row = np.empty(len(order), dtype=int)
+    row[order] = np.cumsum(new_row)
+
+    # Column boundaries, from rows that look like table rows
+    in_table = np.bincount(row)[row] >= 2
+    if not in_table.any():
+        in_table[:] = True
+    left, right = x0[in_table], x1[in_table]
+    order = np.argsort(left, kind="stable")
+    left, right = left[order], right[order]
+    reach = np.maximum.accumulate(right)
+    new_column = np.concatenate(([True], left[1:] > reach[:-1] + line_height * COLUMN_GAP_RATIO))
+    starts = left[new_column]
+
+    x_centre = (x0 + x1) / 2
+    column = np.clip(np.searchsorted(starts, x_centre, side="right") - 1, 0, None)
+
+    cells = (
+        pd.DataFrame({"row": row, "column": column, "x0": x0, "text": text})
+        .sort_values(["row", "column", "x0"])
+        .groupby(["row", "column"], sort=True)["text"]
+        .agg(" ".join)
+        .unstack(fill_value="")
+        .reindex(columns=range(len(starts)), fill_value="")
+    )
+    return cells.values.tolist()
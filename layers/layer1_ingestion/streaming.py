@@ -0,0 +1,101 @@
+import io
+import os
+import sys
+
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.insert(0, BASE_DIR)
+
+from ingestion import clean_dataframe
+from utils.observability import span
+
+# Formats that can be parsed before the whole file has arrived
+STREAMABLE_EXTENSIONS = {"csv"}
+
+
+# -----------------------------------------------
+# STREAMING CSV — Parse rows as bytes arrive
+# -----------------------------------------------
+
+class CSVStreamParser:
+    """
+    Turns a CSV that arrives in pieces into DataFrames of complete rows.
+    Bytes are buffered until a row boundary (a newline outside quotes),
+    every piece is parsed as text with the original header, and the
+    unfinished tail waits for the next feed().
+    """
+
+    def __init__(self):
+        self.header = None
+        self.buffer = b""
+        self.rows = 0
+
+    def feed(self, data: bytes):
+        """
+        Adds bytes and returns a DataFrame of the rows they completed,
+        or None if no row finished yet.
+        """
+        self.buffer += data
+
+        if self.header is None:
+            end = row_boundary(self.buffer, first=True)
+            if end == 0:
+                return None
+            self.header, self.buffer = self.buffer[:end], self.buffer[end:]
+
+        end = row_boundary(self.buffer)
+        if end == 0:
+            return None
+
+        complete, self.buffer = self.buffer[:end], self.buffer[end:]
+        return self._parse(complete)
+
+    def close(self):
+        """
+        Parses whatever is left (a last row without a trailing newline).
+        """
+        if self.header is None or not self.buffer.strip():
+            return None
+        rest, self.buffer = self.buffer, b""
+        return self._parse(rest)
+
+    def _parse(self, body: bytes) -> pd.DataFrame:
+        with span("ingest.parse_chunk", format="csv", bytes=len(body)) as s:
+            # Everything stays text here, the loader decides the column types
+            df = pd.read_csv(io.BytesIO(self.header + body), dtype=str)
+            df = clean_dataframe(df, drop_empty_columns=False)
+            s["rows"] = len(df)
+        self.rows += len(df)
+        return df
+
+
+def row_boundary(buffer: bytes, first: bool = False) -> int:
+    """
+    Returns the index just past the last newline in buffer that is not
+    inside a quoted field (the first such newline if first=True),
+    or 0 if there is none. buffer must start at a row boundary.
+    Escaped quotes ("") count twice, so they never flip the parity.
+    """
+    if first:
+        quotes = 0
+        start = 0
+        while True:
+            newline = buffer.find(b"\n", start)
+            if newline == -1:
+                return 0
+            quotes += buffer.count(b'"', start, newline)
+            if quotes % 2 == 0:
+                return newline + 1
+            start = newline + 1
+
+    quotes = buffer.count(b'"')
+    end = len(buffer)
+    while True:
+        newline = buffer.rfind(b"\n", 0, end)
+        if newline == -1:
+            return 0
+        quotes -= buffer.count(b'"', newline, end)
+        if quotes % 2 == 0:
+            return newline + 1
+        end = newline
@@ -0,0 +1,60 @@
+import gzip
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, "../layer2_sql"))
+
+from ingestion import ingest_file, is_arrow_format
+from sql_engine import infer_data_types
+
+# Mixed date formats only infer_data_types understands
+ROWS = [
+    {"day": day, "amount": i * 1.5, "region": "North"}
+    for i, day in enumerate(["2024-01-05", "Jan 6 2024", "2024/01/07 10:00", "07-01-2024"] * 5)
+]
+
+
+@pytest.fixture
+def files(tmp_path):
+    csv_path = tmp_path / "sales.csv"
+    pd.DataFrame(ROWS).to_csv(csv_path, index=False)
+    with gzip.open(tmp_path / "sales.csv.gz", "wt") as f:
+        f.write(csv_path.read_text())
+    with open(tmp_path / "sales.jsonl", "w") as f:
+        for i, row in enumerate(ROWS):
+            f.write(json.dumps({**row, "meta": {"n": i}}) + "\n")
+    return tmp_path
+
+
+# -----------------------------------------------
+# SCHEMA-LESS FORMATS — Same inferred types as plain CSV
+# -----------------------------------------------
+
+@pytest.mark.parametrize("name", ["sales.csv.gz", "sales.jsonl"])
+def test_schemaless_formats_match_csv(files, name):
+    path = str(files / name)
+    assert not is_arrow_format(path)
+
+    expected = infer_data_types(ingest_file(str(files / "sales.csv"))).dtypes
+    df = infer_data_types(ingest_file(path))
+
+    pd.testing.assert_series_equal(df.dtypes[expected.index], expected)
+    assert str(df["day"].dtype).startswith("datetime64")
+
+
+def test_jsonl_nested_values_become_json_text(files):
+    df = ingest_file(str(files / "sales.jsonl"))
+    assert json.loads(df["meta"].iloc[3]) == {"n": 3}
+
+
+def test_infer_data_types_keeps_typed_dates():
+    df = pd.DataFrame({"day": pd.to_datetime(["2024-01-01", "2024-02-01"]), "n": ["1", "2"]})
+    inferred = infer_data_types(df)
+    assert str(inferred["day"].dtype).startswith("datetime64")
+    assert str(inferred["n"].dtype) == "int64"
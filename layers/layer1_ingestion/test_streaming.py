@@ -0,0 +1,64 @@
+import io
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ingestion import clean_dataframe
+from streaming import CSVStreamParser, row_boundary
+
+# A quoted field with newlines and escaped quotes in the middle of the file
+CSV = (
+    b'id,note,amount\n'
+    b'1,plain,10\n'
+    b'2,"line one\nline ""two""\nline three",20\n'
+    b'3,"a,b",30\n'
+    b'4,last,40\n'
+)
+
+
+def parse_whole(data: bytes) -> pd.DataFrame:
+    return clean_dataframe(pd.read_csv(io.BytesIO(data), dtype=str), drop_empty_columns=False)
+
+
+def stream(pieces: list) -> pd.DataFrame:
+    parser = CSVStreamParser()
+    frames = [parser.feed(piece) for piece in pieces] + [parser.close()]
+    return pd.concat([f for f in frames if f is not None], ignore_index=True)
+
+
+# -----------------------------------------------
+# ROW BOUNDARY
+# -----------------------------------------------
+
+def test_row_boundary_skips_newlines_inside_quotes():
+    body = CSV[CSV.index(b"\n") + 1:]
+    # Cut inside the quoted field: only the row before it is complete
+    inside = body.index(b"line three")
+    assert row_boundary(body[:inside]) == body.index(b"2,")
+    # The whole body ends on a real row boundary
+    assert row_boundary(body) == len(body)
+    assert row_boundary(b'1,"no end\nyet') == 0
+
+
+def test_row_boundary_first_row_only():
+    assert row_boundary(CSV, first=True) == CSV.index(b"\n") + 1
+
+
+# -----------------------------------------------
+# STREAM PARSER — Every split gives the same rows
+# -----------------------------------------------
+
+def test_quoted_newline_across_chunk_boundary():
+    expected = parse_whole(CSV)
+    for cut in range(1, len(CSV)):
+        result = stream([CSV[:cut], CSV[cut:]])
+        pd.testing.assert_frame_equal(result, expected, obj=f"split at byte {cut}")
+
+
+def test_many_small_chunks_and_no_trailing_newline():
+    data = CSV.rstrip(b"\n")
+    pieces = [data[i:i + 3] for i in range(0, len(data), 3)]
+    pd.testing.assert_frame_equal(stream(pieces), parse_whole(data))
@@ -0,0 +1,374 @@
+import json
+import os
+import sys
+import threading
+
+from sqlalchemy import text
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.insert(0, BASE_DIR)
+
+from sql_engine import copy_arrow_table
+from utils.database import get_engine, get_async_engine
+from utils.observability import span
+
+# -----------------------------------------------
+# CONFIG
+# -----------------------------------------------
+
+# Upload tables not opened for this long are moved to cold storage; 0 disables eviction
+TABLE_TTL_HOURS = float(os.getenv("TABLE_TTL_HOURS", "168"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(BASE_DIR, "archive"))
+LIFECYCLE_INTERVAL_S = int(os.getenv("LIFECYCLE_INTERVAL_S", "3600"))
+EVICT_BATCH = int(os.getenv("LIFECYCLE_EVICT_BATCH", "50"))
+# An 'archiving' / 'rehydrating' claim older than this is taken to belong to
+# a worker that died; keep it above the longest export or reload
+CLAIM_TIMEOUT_S = int(os.getenv("LIFECYCLE_CLAIM_TIMEOUT_S", "21600"))
+ARCHIVE_COMPRESSION = "zstd"
+
+# Parquet schema metadata key holding the original PostgreSQL column types
+COLUMNS_METADATA_KEY = b"datamind.columns"
+
+# Stored with a native Parquet type; anything else is kept as the text
+# PostgreSQL prints and parsed back by PostgreSQL on rehydration
+ARCHIVE_TYPES = {
+    "smallint": "int16",
+    "integer": "int32",
+    "bigint": "int64",
+    "real": "float32",
+    "double precision": "float64",
+    "boolean": "bool_",
+    "date": "date32",
+    "text": "string",
+}
+
+# upload_id of rehydrations running in this process
+_rehydrating = set()
+_rehydrating_lock = threading.Lock()
+
+
+# -----------------------------------------------
+# SCHEMA — Lifecycle columns on the uploads table
+# -----------------------------------------------
+
+def ensure_lifecycle_schema() -> None:
+    """
+    Adds the lifecycle columns to an existing uploads table. Safe to
+    run on every start.
+    """
+    with get_engine().connect() as conn:
+        conn.execute(text("ALTER TABLE uploads ADD COLUMN IF NOT EXISTS last_accessed_at TIMESTAMP"))
+        conn.execute(text("ALTER TABLE uploads ADD COLUMN IF NOT EXISTS archive_path TEXT"))
+        conn.execute(text("ALTER TABLE uploads ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS uploads_table_name_idx ON uploads (table_name)"))
+        conn.commit()
+
+
+# -----------------------------------------------
+# ACCESS — Track use, trigger rehydration
+# -----------------------------------------------
+
+async def touch_table_async(table_name: str):
+    """
+    Records an access to an upload table and returns its status
+    ("ready", "archived", "rehydrating", ...), or None for tables that
+    are not tracked in uploads. An archived table starts rehydrating
+    in the background and "rehydrating" is returned. A rehydration
+    whose worker died is started again.
+    """
+    async with get_async_engine().connect() as conn:
+        row = (await conn.execute(text("""
+            UPDATE uploads SET last_accessed_at = NOW()
+            WHERE table_name = :table_name
+            RETURNING upload_id, status,
+                      COALESCE(claimed_at, '-infinity') < NOW() - make_interval(secs => :timeout) AS stale
+        """), {"table_name": table_name, "timeout": CLAIM_TIMEOUT_S})).fetchone()
+        await conn.commit()
+
+    if row is None:
+        return None
+    if row.status == "rehydrating" and row.stale:
+        from fastapi.concurrency import run_in_threadpool
+
+        await run_in_threadpool(recover_stale_claims)
+        return "rehydrating"
+    if row.status == "archived":
+        start_rehydration(str(row.upload_id))
+        return "rehydrating"
+    return row.status
+
+
+def start_rehydration(upload_id: str) -> None:
+    with _rehydrating_lock:
+        if upload_id in _rehydrating:
+            return
+        _rehydrating.add(upload_id)
+    threading.Thread(target=_rehydrate_in_background, args=(upload_id,), daemon=True).start()
+
+
+def _rehydrate_in_background(upload_id: str) -> None:
+    try:
+        rehydrate_table(upload_id)
+    except Exception as e:
+        print(f"⚠️ Rehydration failed for upload {upload_id}: {e}")
+    finally:
+        with _rehydrating_lock:
+            _rehydrating.discard(upload_id)
+
+
+def find_archived_upload(table_name: str):
+    """
+    upload_id of an archived upload table, or None.
+    """
+    with get_engine().connect() as conn:
+        return conn.execute(text("""
+            SELECT upload_id FROM uploads
+            WHERE table_name = :table_name AND status IN ('archived', 'rehydrating')
+        """), {"table_name": table_name}).scalar()
+
+
+# -----------------------------------------------
+# EVICT — Idle tables → compressed Parquet
+# -----------------------------------------------
+
+def evict_idle_tables(ttl_hours: float = None, limit: int = None) -> list:
+    """
+    Archives up to `limit` upload tables that have not been accessed
+    for ttl_hours: exports each to Parquet, then drops it.
+    Returns the archived table names.
+    """
+    ttl_hours = TABLE_TTL_HOURS if ttl_hours is None else ttl_hours
+    limit = limit or EVICT_BATCH
+    if ttl_hours <= 0:
+        return []
+
+    # Claim candidates first, so concurrent workers never archive the same table
+    with get_engine().connect() as conn:
+        claimed = conn.execute(text("""
+            UPDATE uploads SET status = 'archiving', claimed_at = NOW()
+            WHERE upload_id IN (
+                SELECT upload_id FROM uploads
+                WHERE status = 'ready'
+                  AND COALESCE(last_accessed_at, uploaded_at) < NOW() - make_interval(secs => :ttl)
+                ORDER BY COALESCE(last_accessed_at, uploaded_at)
+                LIMIT :limit
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING upload_id, table_name
+        """), {"ttl": ttl_hours * 3600, "limit": limit}).fetchall()
+        conn.commit()
+
+    archived = []
+    for upload_id, table_name in claimed:
+        try:
+            if archive_table(str(upload_id), table_name, ttl_hours):
+                archived.append(table_name)
+        except Exception as e:
+            print(f"⚠️ Archiving '{table_name}' failed: {e}")
+            set_status(upload_id, "ready")
+    return archived
+
+
+def archive_table(upload_id: str, table_name: str, ttl_hours: float) -> bool:
+    """
+    Exports one table and drops it. If the table was accessed while it
+    was being exported, the export is thrown away and it stays.
+    """
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(ARCHIVE_DIR, f"{table_name}.parquet")
+
+    with span("lifecycle.archive", table=table_name) as s:
+        try:
+            s["rows"] = export_table(table_name, path)
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        s["bytes"] = os.path.getsize(path)
+
+        with get_engine().connect() as conn:
+            still_idle = conn.execute(text("""
+                UPDATE uploads SET status = 'archived', archive_path = :path
+                WHERE upload_id = :upload_id AND status = 'archiving'
+                  AND COALESCE(last_accessed_at, uploaded_at) < NOW() - make_interval(secs => :ttl)
+                RETURNING upload_id
+            """), {"path": path, "upload_id": upload_id, "ttl": ttl_hours * 3600}).fetchone()
+
+            if still_idle is None:
+                conn.rollback()
+                os.remove(path)
+                set_status(upload_id, "ready")
+                return False
+
+            conn.execute(text(f'DROP TABLE IF EXISTS public."{table_name}"'))
+            conn.commit()
+
+    print(f"✅ Archived '{table_name}' ({s['rows']} rows, {s['bytes'] / 1e6:.1f} MB) to {path}")
+    return True
+
+
+def export_table(table_name: str, path: str) -> int:
+    """
+    Streams a table out with COPY into a zstd Parquet file, keeping the
+    PostgreSQL column types in the file metadata. Returns the row count.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    with get_engine().connect() as conn:
+        columns = [tuple(row) for row in conn.execute(text("""
+            SELECT attname, format_type(atttypid, atttypmod)
+            FROM pg_attribute
+            WHERE attrelid = CAST(:name AS regclass) AND attnum > 0 AND NOT attisdropped
+            ORDER BY attnum
+        """), {"name": f'public."{table_name}"'})]
+    names = [name for name, _ in columns]
+
+    csv_path = path + ".csv"
+    conn = get_engine().raw_connection()
+    try:
+        with open(csv_path, "wb") as f:
+            conn.cursor().copy_expert(f'COPY public."{table_name}" TO STDOUT WITH (FORMAT csv)', f)
+    finally:
+        conn.close()
+
+    def write(typed: bool) -> int:
+        column_types = {
+            name: getattr(pa, ARCHIVE_TYPES.get(sql_type, "string"))() if typed else pa.string()
+            for name, sql_type in columns
+        }
+        # COPY writes NULL as an unquoted empty field and '' as ""
+        convert = pa_csv.ConvertOptions(
+            column_types=column_types, null_values=[""], strings_can_be_null=True,
+            quoted_strings_can_be_null=False, true_values=["t"], false_values=["f"]
+        )
+        schema = pa.schema([(name, column_types[name]) for name in names]).with_metadata(
+            {COLUMNS_METADATA_KEY: json.dumps(columns)}
+        )
+        rows = 0
+        reader = pa_csv.open_csv(csv_path, read_options=pa_csv.ReadOptions(column_names=names),
+                                 convert_options=convert)
+        with pq.ParquetWriter(path, schema, compression=ARCHIVE_COMPRESSION) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        return rows
+
+    try:
+        try:
+            return write(typed=True)
+        except pa.ArrowInvalid:
+            # e.g. NaN / Infinity text the typed parser rejects; text always round-trips
+            return write(typed=False)
+    finally:
+        os.remove(csv_path)
+
+
+# -----------------------------------------------
+# REHYDRATE — Parquet → PostgreSQL via the bulk loader
+# -----------------------------------------------
+
+def rehydrate_table(upload_id: str) -> bool:
+    """
+    Reloads an archived upload table with the Arrow COPY loader, using
+    the original column types. Returns False if another worker is
+    already doing it (or it is no longer archived).
+    """
+    import pyarrow.parquet as pq
+
+    with get_engine().connect() as conn:
+        row = conn.execute(text("""
+            UPDATE uploads SET status = 'rehydrating', claimed_at = NOW()
+            WHERE upload_id = :upload_id AND status = 'archived'
+            RETURNING table_name, archive_path
+        """), {"upload_id": upload_id}).fetchone()
+        conn.commit()
+    if row is None:
+        return False
+    table_name, path = row
+
+    try:
+        with span("lifecycle.rehydrate", table=table_name, bytes=os.path.getsize(path)) as s:
+            table = pq.read_table(path, memory_map=True)
+            columns = json.loads(table.schema.metadata[COLUMNS_METADATA_KEY])
+            copy_arrow_table(table, table_name, sql_types=dict(columns))
+            s["rows"] = table.num_rows
+    except Exception:
+        set_status(upload_id, "archived")
+        raise
+
+    with get_engine().connect() as conn:
+        conn.execute(text("""
+            UPDATE uploads SET status = 'ready', archive_path = NULL, last_accessed_at = NOW()
+            WHERE upload_id = :upload_id
+        """), {"upload_id": upload_id})
+        conn.commit()
+    os.remove(path)
+    print(f"✅ Rehydrated '{table_name}' ({table.num_rows} rows)")
+    return True
+
+
+def set_status(upload_id: str, status: str) -> None:
+    with get_engine().connect() as conn:
+        conn.execute(text("UPDATE uploads SET status = :status WHERE upload_id = :upload_id"),
+                     {"status": status, "upload_id": upload_id})
+        conn.commit()
+
+
+# -----------------------------------------------
+# RECOVERY — Claims left behind by a crash or restart
+# -----------------------------------------------
+
+def recover_stale_claims(timeout_s: int = None) -> list:
+    """
+    Releases 'archiving' / 'rehydrating' claims older than timeout_s:
+    an interrupted archive goes back to 'ready' (the table was never
+    dropped) and its partial export is deleted; an interrupted
+    rehydration goes back to 'archived' and is started again.
+    Returns the (table_name, new status) pairs.
+    """
+    timeout_s = CLAIM_TIMEOUT_S if timeout_s is None else timeout_s
+    with get_engine().connect() as conn:
+        released = conn.execute(text("""
+            UPDATE uploads
+            SET status = CASE status WHEN 'archiving' THEN 'ready' ELSE 'archived' END,
+                claimed_at = NULL
+            WHERE status IN ('archiving', 'rehydrating')
+              AND COALESCE(claimed_at, '-infinity') < NOW() - make_interval(secs => :timeout)
+            RETURNING upload_id, table_name, status
+        """), {"timeout": timeout_s}).fetchall()
+        conn.commit()
+
+    for upload_id, table_name, status in released:
+        print(f"⚠️ Released stale claim on '{table_name}', now {status}")
+        if status == "ready":
+            path = os.path.join(ARCHIVE_DIR, f"{table_name}.parquet")
+            for leftover in (path, path + ".csv"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+        else:
+            start_rehydration(str(upload_id))
+    return [(table_name, status) for _, table_name, status in released]
+
+
+# -----------------------------------------------
+# BACKGROUND LOOP — Started from the FastAPI lifespan
+# -----------------------------------------------
+
+async def run_lifecycle_loop() -> None:
+    """
+    Releases stale claims and evicts idle tables every
+    LIFECYCLE_INTERVAL_S. Every API worker can run it: candidates are
+    claimed with SKIP LOCKED.
+    """
+    import asyncio
+    from fastapi.concurrency import run_in_threadpool
+
+    while True:
+        try:
+            await run_in_threadpool(recover_stale_claims)
+            await run_in_threadpool(evict_idle_tables)
+        except Exception as e:
+            print(f"⚠️ Lifecycle run failed: {e}")
+        await asyncio.sleep(LIFECYCLE_INTERVAL_S)
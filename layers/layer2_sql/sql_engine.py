@@ -1,14 +1,19 @@
+import io
+import numpy as np
 import pandas as pd
 import uuid
-from sqlalchemy import create_engine, text, inspect
-from dotenv import load_dotenv
+from sqlalchemy import text, inspect
+from sqlalchemy.exc import NoSuchTableError
+from sqlalchemy.types import BigInteger, Integer, REAL, SmallInteger
 import os
 import re
+import sys
 
-load_dotenv()
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.insert(0, BASE_DIR)
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+from utils.database import get_engine, get_async_engine, statement_timeout_sql
+from utils.observability import span
 
 
 # -----------------------------------------------
@@ -23,34 +28,57 @@ def push_to_postgres(df: pd.DataFrame, file_name: str, user_id: str = None) -> d
     Returns metadata about the upload.
     """
 
+    with span("push_to_postgres", rows=df.shape[0], columns=df.shape[1]):
+        return _push_to_postgres(df, file_name, user_id)
+
+
+def _push_to_postgres(df: pd.DataFrame, file_name: str, user_id: str = None) -> dict:
     # Step 1 — Generate unique IDs
     upload_id = str(uuid.uuid4())
     if not user_id:
-        user_id = get_or_create_default_user()
+        with span("load.default_user"):
+            user_id = get_or_create_default_user()
 
     # Step 2 — Generate a safe unique table name
     table_name = generate_table_name(file_name, upload_id)
 
-    # Step 3 — Infer and fix data types
-    df = infer_data_types(df)
+    # Step 3 — Infer and fix data types (on a shallow copy: the caller's frame is left as is)
+    with span("load.infer_types", columns=df.shape[1]):
+        df = infer_data_types(df.copy(deep=False))
+
+    # Step 3b — Shrink dtypes to the smallest safe width
+    with span("load.compact_dtypes", columns=df.shape[1]):
+        df, storage = compact_dtypes(df)
+        sql_types = storage.pop("sql_types")
 
     # Step 4 — Push DataFrame to PostgreSQL
     try:
-        df.to_sql(
-            name=table_name,
-            con=engine,
-            if_exists="replace",
-            index=False,
-            schema="public"
-        )
+        with span("db.acquire"):
+            conn = get_engine().connect()
+        with conn, span("load.to_sql", table=table_name, rows=df.shape[0]):
+            df.to_sql(
+                name=table_name,
+                con=conn,
+                if_exists="replace",
+                index=False,
+                schema="public",
+                dtype=sql_types
+            )
+            conn.commit()
+            storage["table_bytes"] = get_table_size(conn, table_name)
         print(f"✅ Table '{table_name}' created with {df.shape[0]} rows x {df.shape[1]} columns")
+        print(
+            f"✅ Compacted: memory {storage['memory_bytes_before'] / 1e6:.1f} MB → "
+            f"{storage['memory_bytes_after'] / 1e6:.1f} MB, "
+            f"~{storage['disk_bytes_saved_estimate'] / 1e6:.1f} MB less on disk"
+        )
     except Exception as e:
         log_upload_status(upload_id, user_id, file_name, table_name, "failed")
         raise RuntimeError(f"Failed to push data to PostgreSQL: {e}")
 
     # Step 5 — Log the upload
-    file_type = file_name.rsplit(".", 1)[-1].lower()
-    log_upload_status(upload_id, user_id, file_name, table_name, "ready", file_type)
+    with span("load.log_upload"):
+        log_upload_status(upload_id, user_id, file_name, table_name, "ready", get_file_type(file_name))
 
     # Step 6 — Return metadata
     return {
@@ -61,24 +89,390 @@ def push_to_postgres(df: pd.DataFrame, file_name: str, user_id: str = None) -> d
         "rows": df.shape[0],
         "columns": df.shape[1],
         "column_names": list(df.columns),
+        "storage": storage,
         "status": "ready"
     }
 
 
+# -----------------------------------------------
+# ARROW LOADER — pyarrow.Table → PostgreSQL via COPY
+# -----------------------------------------------
+
+# Rows per COPY round trip
+COPY_BATCH_ROWS = int(os.getenv("COPY_BATCH_ROWS", "100000"))
+
+
+def push_arrow_to_postgres(table, file_name: str, user_id: str = None) -> dict:
+    """
+    Bulk-loads an Arrow table (Parquet, Feather, JSONL, compressed CSV).
+    Column types come from the Arrow schema, so infer_data_types and
+    dtype compaction are skipped, and rows are streamed with COPY
+    instead of row-by-row INSERTs.
+    Returns the same metadata as push_to_postgres.
+    """
+
+    with span("push_to_postgres", rows=table.num_rows, columns=table.num_columns, arrow=True):
+        return _push_arrow_to_postgres(table, file_name, user_id)
+
+
+def _push_arrow_to_postgres(table, file_name: str, user_id: str = None) -> dict:
+    upload_id = str(uuid.uuid4())
+    if not user_id:
+        with span("load.default_user"):
+            user_id = get_or_create_default_user()
+
+    table_name = generate_table_name(file_name, upload_id)
+
+    try:
+        copy_arrow_table(table, table_name)
+        with get_engine().connect() as conn:
+            table_bytes = get_table_size(conn, table_name)
+        print(f"✅ Table '{table_name}' copied with {table.num_rows} rows x {table.num_columns} columns")
+    except Exception as e:
+        log_upload_status(upload_id, user_id, file_name, table_name, "failed")
+        raise RuntimeError(f"Failed to push data to PostgreSQL: {e}")
+
+    with span("load.log_upload"):
+        log_upload_status(upload_id, user_id, file_name, table_name, "ready", get_file_type(file_name))
+
+    return {
+        "upload_id": upload_id,
+        "user_id": user_id,
+        "table_name": table_name,
+        "file_name": file_name,
+        "rows": table.num_rows,
+        "columns": table.num_columns,
+        "column_names": table.column_names,
+        "storage": {
+            "memory_bytes_before": table.nbytes,
+            "memory_bytes_after": table.nbytes,
+            "memory_saved_pct": 0.0,
+            "disk_bytes_saved_estimate": 0,
+            "columns": {},
+            "table_bytes": table_bytes,
+        },
+        "status": "ready"
+    }
+
+
+def copy_arrow_table(table, table_name: str, sql_types: dict = None) -> None:
+    """
+    (Re)creates public.<table_name> and fills it with COPY, one record
+    batch at a time. Column types come from sql_types ({column: SQL
+    type}) or, by default, from the Arrow schema.
+    """
+    import pyarrow.csv as pa_csv
+
+    sql_types = sql_types or {field.name: arrow_sql_type(field.type) for field in table.schema}
+    table = arrow_to_copyable(table)
+    column_list = ", ".join(f'"{name}"' for name in table.column_names)
+
+    with span("db.acquire"):
+        conn = get_engine().raw_connection()
+    try:
+        with span("load.copy", table=table_name, rows=table.num_rows):
+            cursor = conn.cursor()
+            cursor.execute(f'DROP TABLE IF EXISTS public."{table_name}"')
+            cursor.execute(
+                f'CREATE TABLE public."{table_name}" ('
+                + ", ".join(f'"{name}" {sql_type}' for name, sql_type in sql_types.items())
+                + ")"
+            )
+            # Every valid value is quoted, so empty strings stay empty
+            # strings and only unquoted empty fields load as NULL
+            options = pa_csv.WriteOptions(include_header=False, quoting_style="all_valid")
+            for batch in table.to_batches(max_chunksize=COPY_BATCH_ROWS):
+                buffer = io.BytesIO()
+                pa_csv.write_csv(batch, buffer, write_options=options)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f'COPY public."{table_name}" ({column_list}) FROM STDIN WITH (FORMAT csv)',
+                    buffer
+                )
+            conn.commit()
+            cursor.close()
+    finally:
+        conn.close()
+
+
+def arrow_sql_type(arrow_type) -> str:
+    """
+    PostgreSQL column type for an Arrow type. Unsigned types move up
+    one size so every value fits; nested types are stored as JSON text.
+    """
+    import pyarrow as pa
+    types = pa.types
+
+    if types.is_boolean(arrow_type):
+        return "BOOLEAN"
+    if types.is_int8(arrow_type) or types.is_int16(arrow_type) or types.is_uint8(arrow_type):
+        return "SMALLINT"
+    if types.is_int32(arrow_type) or types.is_uint16(arrow_type):
+        return "INTEGER"
+    if types.is_int64(arrow_type) or types.is_uint32(arrow_type):
+        return "BIGINT"
+    if types.is_uint64(arrow_type):
+        return "NUMERIC(20)"
+    if types.is_float16(arrow_type) or types.is_float32(arrow_type):
+        return "REAL"
+    if types.is_float64(arrow_type):
+        return "DOUBLE PRECISION"
+    if types.is_decimal(arrow_type):
+        return f"NUMERIC({arrow_type.precision}, {arrow_type.scale})"
+    if types.is_timestamp(arrow_type):
+        return "TIMESTAMPTZ" if arrow_type.tz else "TIMESTAMP"
+    if types.is_date(arrow_type):
+        return "DATE"
+    if types.is_time(arrow_type):
+        return "TIME"
+    if types.is_duration(arrow_type):
+        return "INTERVAL"
+    return "TEXT"
+
+
+def arrow_to_copyable(table):
+    """
+    Converts the columns COPY's CSV input can't take as-is:
+    dictionaries are decoded, durations become interval text, and
+    nested or binary values become JSON / hex text.
+    """
+    import json
+    import pyarrow as pa
+    types = pa.types
+
+    columns = []
+    for column in table.columns:
+        if types.is_dictionary(column.type):
+            column = column.cast(column.type.value_type)
+        if types.is_duration(column.type):
+            micros = column.cast(pa.duration("us"), safe=False).cast(pa.int64())
+            column = pa.array([None if v is None else f"{v} microseconds" for v in micros.to_pylist()],
+                              pa.string())
+        elif types.is_nested(column.type):
+            column = pa.array(
+                [None if v is None else json.dumps(v, default=str) for v in column.to_pylist()],
+                pa.string()
+            )
+        elif types.is_binary(column.type) or types.is_large_binary(column.type) \
+                or types.is_fixed_size_binary(column.type):
+            column = pa.array([None if v is None else v.hex() for v in column.to_pylist()], pa.string())
+        columns.append(column)
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+
+# -----------------------------------------------
+# STREAMING LOADER — Append batches as they arrive
+# -----------------------------------------------
+
+class StreamingTableLoader:
+    """
+    Loads one upload into PostgreSQL batch by batch, for files that are
+    parsed while they are still arriving.
+    The first batch decides the column types (via infer_data_types).
+    Later batches are converted to those types; if a value no longer
+    fits, the column is widened in place (BIGINT → DOUBLE PRECISION,
+    anything → TEXT) instead of failing the load.
+    Dtype compaction is skipped: early batches can't tell how wide a
+    column will need to be.
+    """
+
+    def __init__(self, file_name: str, user_id: str = None):
+        self.file_name = file_name
+        self.upload_id = str(uuid.uuid4())
+        self.user_id = user_id or get_or_create_default_user()
+        self.table_name = generate_table_name(file_name, self.upload_id)
+        self.file_type = get_file_type(file_name)
+        self.kinds = None  # column → "integer" | "float" | "datetime" | "text"
+        self.columns = []
+        self.rows = 0
+        log_upload_status(self.upload_id, self.user_id, file_name, self.table_name,
+                          "processing", self.file_type)
+
+    def append(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+
+        with span("load.append_batch", table=self.table_name, rows=len(df)):
+            with span("db.acquire"):
+                conn = get_engine().connect()
+            with conn:
+                if self.kinds is None:
+                    df = infer_data_types(df)
+                    self.kinds = {col: column_kind(df[col]) for col in df.columns}
+                    self.columns = list(df.columns)
+                    if_exists = "replace"
+                else:
+                    df = self._conform(conn, df)
+                    if_exists = "append"
+
+                df.to_sql(
+                    name=self.table_name,
+                    con=conn,
+                    if_exists=if_exists,
+                    index=False,
+                    schema="public"
+                )
+                conn.commit()
+
+        self.rows += len(df)
+
+    def _conform(self, conn, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.reindex(columns=self.columns)
+
+        for col, kind in self.kinds.items():
+            if kind == "text":
+                continue
+
+            raw = df[col]
+            if kind == "datetime":
+                converted = pd.to_datetime(raw, format="mixed", errors="coerce")
+            else:
+                converted = pd.to_numeric(raw, errors="coerce")
+
+            if (converted.isna() & raw.notna()).any():
+                self._widen(conn, col, "TEXT")
+                continue
+
+            if kind == "integer":
+                values = converted.dropna()
+                if (values != values.round()).any():
+                    self._widen(conn, col, "DOUBLE PRECISION")
+                else:
+                    converted = converted.astype("Int64")
+
+            df[col] = converted
+
+        return df
+
+    def _widen(self, conn, col: str, sql_type: str) -> None:
+        conn.execute(text(
+            f'ALTER TABLE public."{self.table_name}" '
+            f'ALTER COLUMN "{col}" TYPE {sql_type} USING "{col}"::{sql_type}'
+        ))
+        conn.commit()
+        self.kinds[col] = "text" if sql_type == "TEXT" else "float"
+        print(f"⚠️ Column '{col}' widened to {sql_type} in '{self.table_name}'")
+
+    def finish(self) -> dict:
+        log_upload_status(self.upload_id, self.user_id, self.file_name, self.table_name,
+                          "ready", self.file_type)
+        print(f"✅ Table '{self.table_name}' streamed with {self.rows} rows x {len(self.columns)} columns")
+        return {
+            "upload_id": self.upload_id,
+            "user_id": self.user_id,
+            "table_name": self.table_name,
+            "file_name": self.file_name,
+            "rows": self.rows,
+            "columns": len(self.columns),
+            "column_names": self.columns,
+            "status": "ready"
+        }
+
+    def abort(self) -> None:
+        """
+        Drops whatever was loaded so far and marks the upload failed.
+        """
+        try:
+            with get_engine().connect() as conn:
+                conn.execute(text(f'DROP TABLE IF EXISTS public."{self.table_name}"'))
+                conn.commit()
+        finally:
+            log_upload_status(self.upload_id, self.user_id, self.file_name, self.table_name,
+                              "failed", self.file_type)
+
+    def state(self) -> dict:
+        """
+        What abort_saved needs to clean up this load from another process.
+        """
+        return {"upload_id": self.upload_id, "user_id": self.user_id, "file_name": self.file_name,
+                "table_name": self.table_name, "file_type": self.file_type}
+
+    @classmethod
+    def abort_saved(cls, state: dict) -> None:
+        """
+        Aborts a load started by an earlier process, from its state().
+        """
+        loader = cls.__new__(cls)
+        loader.__dict__.update(state)
+        loader.abort()
+
+
+def column_kind(series: pd.Series) -> str:
+    if pd.api.types.is_integer_dtype(series):
+        return "integer"
+    if pd.api.types.is_float_dtype(series):
+        return "float"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    return "text"
+
+
 # -----------------------------------------------
 # QUERY FUNCTION — Run SQL on any table
 # -----------------------------------------------
 
-def run_query(sql: str) -> pd.DataFrame:
+def run_query(sql: str, rehydrate: bool = True) -> pd.DataFrame:
     """
     Executes any SQL query and returns result as a DataFrame.
     Used by Layer 3 (dashboard) and Layer 4 (chatbot).
+    If the query hits an upload table that was archived to cold
+    storage, the table is reloaded and the query retried once.
     """
     try:
-        with engine.connect() as conn:
-            result = pd.read_sql_query(text(sql), conn)
+        with span("run_query") as s:
+            with span("db.acquire"):
+                conn = get_engine().connect()
+            with conn, span("query.execute"):
+                # The sync engine has no timeout of its own; queries get one
+                conn.execute(statement_timeout_sql())
+                result = pd.read_sql_query(text(sql), conn)
+            s["rows"] = len(result)
             print(f"✅ Query returned {len(result)} rows")
             return result
+    except Exception as e:
+        missing = re.search(r'relation "(?:public\.)?([^"]+)" does not exist', str(e))
+        if rehydrate and missing and restore_archived_table(missing.group(1)):
+            return run_query(sql, rehydrate=False)
+        raise RuntimeError(f"Query failed: {e}\nSQL: {sql}")
+
+
+def restore_archived_table(table_name: str) -> bool:
+    """
+    Reloads an archived upload table, blocking. Returns False if the
+    table is not archived.
+    """
+    from lifecycle import find_archived_upload, rehydrate_table
+
+    upload_id = find_archived_upload(table_name)
+    if upload_id is None:
+        return False
+    if not rehydrate_table(str(upload_id)):
+        raise RuntimeError(f"Table '{table_name}' is being restored from archive, try again shortly")
+    return True
+
+
+async def run_query_async(sql: str, params: dict = None, timeout_ms: int = None) -> pd.DataFrame:
+    """
+    run_query on the async (asyncpg) engine, for request handlers.
+    Each call checks out its own connection, so several can run at
+    once with asyncio.gather.
+    timeout_ms overrides the engine's statement timeout (0 = no limit),
+    for background work that is expected to take long.
+    """
+    try:
+        with span("run_query_async") as s:
+            with span("db.acquire"):
+                conn = await get_async_engine().connect()
+            try:
+                with span("query.execute"):
+                    if timeout_ms is not None:
+                        await conn.execute(statement_timeout_sql(timeout_ms))
+                    result = await conn.execute(text(sql), params or {})
+                    result = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+            finally:
+                await conn.close()
+            s["rows"] = len(result)
+            return result
     except Exception as e:
         raise RuntimeError(f"Query failed: {e}\nSQL: {sql}")
 
@@ -93,7 +487,7 @@ def get_table_schema(table_name: str) -> dict:
     This is fed to the LLM in Layer 4 as context.
     """
     try:
-        inspector = inspect(engine)
+        inspector = inspect(get_engine())
         columns = inspector.get_columns(table_name, schema="public")
 
         schema = {
@@ -114,6 +508,46 @@ def get_table_schema(table_name: str) -> dict:
         raise RuntimeError(f"Schema inspection failed: {e}")
 
 
+async def get_table_schema_async(table_name: str) -> dict:
+    """
+    get_table_schema on the async engine. Raises LookupError if the
+    table does not exist.
+    """
+    async with get_async_engine().connect() as conn:
+        try:
+            columns = await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).get_columns(table_name, schema="public")
+            )
+        except NoSuchTableError:
+            columns = []
+    if not columns:
+        raise LookupError(f"Table '{table_name}' not found")
+    return {
+        "table_name": table_name,
+        "columns": [{"name": col["name"], "type": str(col["type"])} for col in columns]
+    }
+
+
+# What generate_table_name makes: word characters (Unicode letters and
+# digits included, leading digits too) within PostgreSQL's 63-byte limit
+TABLE_NAME_PATTERN = re.compile(r"\w+")
+MAX_IDENTIFIER_BYTES = 63
+
+
+def validate_table_name(table_name: str) -> str:
+    """
+    Table names come from URLs; only allow what generate_table_name makes.
+    """
+    if not TABLE_NAME_PATTERN.fullmatch(table_name) \
+            or len(table_name.encode("utf-8")) > MAX_IDENTIFIER_BYTES:
+        raise ValueError(f"Invalid table name: {table_name}")
+    return table_name
+
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
 # -----------------------------------------------
 # DATA TYPE INFERENCE — Clean up column types
 # -----------------------------------------------
@@ -124,8 +558,13 @@ def infer_data_types(df: pd.DataFrame) -> pd.DataFrame:
     - Numeric strings → int or float
     - Date strings → datetime
     - Everything else stays as string
+    Columns the reader already typed (numbers, dates from Excel or
+    JSONL) are left alone; to_numeric would turn dates into integers.
     """
     for col in df.columns:
+        if not (df[col].dtype == object or pd.api.types.is_string_dtype(df[col])):
+            continue
+
         # Try numeric
         try:
             df[col] = pd.to_numeric(df[col])
@@ -146,24 +585,190 @@ def infer_data_types(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+# -----------------------------------------------
+# DTYPE COMPACTION — Smallest safe types in memory and on disk
+# -----------------------------------------------
+
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+# On-disk width per value, used to estimate savings (TEXT is unchanged)
+SQL_TYPE_BYTES = {"SMALLINT": 2, "INTEGER": 4, "BIGINT": 8, "REAL": 4, "DOUBLE PRECISION": 8}
+
+INT_TARGETS = [
+    ("int8", np.iinfo(np.int8), SmallInteger, "SMALLINT"),
+    ("int16", np.iinfo(np.int16), SmallInteger, "SMALLINT"),
+    ("int32", np.iinfo(np.int32), Integer, "INTEGER"),
+    ("int64", np.iinfo(np.int64), BigInteger, "BIGINT"),
+]
+
+
+def compact_dtypes(df: pd.DataFrame) -> tuple:
+    """
+    Downcasts columns without changing any value:
+    - Integers → smallest of int8/16/32/64 that fits (SMALLINT / INTEGER / BIGINT)
+    - Whole-number floats with NaNs → nullable Int types
+    - Floats that survive a float4 round trip → float32 (REAL)
+    - Low-cardinality text → category (still TEXT in PostgreSQL)
+    Returns (new df, storage report); the input frame is not modified.
+    The report's "sql_types" entry is the dtype map for df.to_sql.
+    """
+    # Columns are replaced, never written into, so a shallow copy is enough
+    df = df.copy(deep=False)
+    rows = len(df)
+    memory_before = int(df.memory_usage(deep=True, index=False).sum())
+    sql_types = {}
+    columns = {}
+    disk_saved = 0
+
+    for col in df.columns:
+        series = df[col]
+        before = str(series.dtype)
+        before_sql = sql_type_name(series)
+        target = None
+
+        if pd.api.types.is_bool_dtype(series):
+            continue
+
+        elif pd.api.types.is_integer_dtype(series) or is_whole_float(series):
+            target = smallest_int(series)
+
+        elif pd.api.types.is_float_dtype(series):
+            if survives_float4(series):
+                df[col] = series.astype("float32")
+                target = ("float32", REAL, "REAL")
+
+        elif series.dtype == object and rows:
+            non_null = series.dropna()
+            if len(non_null) and non_null.map(type).eq(str).all() \
+                    and non_null.nunique() <= len(non_null) * CATEGORY_MAX_RATIO:
+                categorical = series.astype("category")
+                # Tiny columns can grow from the category overhead
+                if categorical.memory_usage(deep=True) < series.memory_usage(deep=True):
+                    df[col] = categorical
+                    columns[col] = {"from": before, "to": "category", "sql_type": "TEXT"}
+            continue
+
+        if target is None:
+            continue
+
+        name, sql_type, sql_name = target
+        if name != "float32":
+            nullable = series.isna().any()
+            df[col] = series.astype(name.capitalize() if nullable else name)
+        if str(df[col].dtype) == before:
+            continue  # already as small as it gets
+        sql_types[col] = sql_type
+        columns[col] = {"from": before, "to": str(df[col].dtype), "sql_type": sql_name}
+        disk_saved += rows * (SQL_TYPE_BYTES.get(before_sql, 0) - SQL_TYPE_BYTES[sql_name])
+
+    memory_after = int(df.memory_usage(deep=True, index=False).sum())
+    return df, {
+        "memory_bytes_before": memory_before,
+        "memory_bytes_after": memory_after,
+        "memory_saved_pct": round(100 * (1 - memory_after / memory_before), 1) if memory_before else 0.0,
+        "disk_bytes_saved_estimate": max(disk_saved, 0),
+        "columns": columns,
+        "sql_types": sql_types,
+    }
+
+
+def sql_type_name(series: pd.Series) -> str:
+    """
+    The PostgreSQL type df.to_sql would have picked before compaction.
+    """
+    if pd.api.types.is_integer_dtype(series):
+        return "BIGINT"
+    if pd.api.types.is_float_dtype(series):
+        return "DOUBLE PRECISION"
+    return "TEXT"
+
+
+def is_whole_float(series: pd.Series) -> bool:
+    if not pd.api.types.is_float_dtype(series):
+        return False
+    values = series.dropna().to_numpy()
+    if len(values) == 0 or not np.isfinite(values).all():
+        return False
+    int64 = np.iinfo(np.int64)
+    return bool((values == np.round(values)).all()
+                and values.min() >= int64.min and values.max() < int64.max)
+
+
+def smallest_int(series: pd.Series) -> tuple:
+    values = series.dropna()
+    low, high = (values.min(), values.max()) if len(values) else (0, 0)
+    for name, info, sql_type, sql_name in INT_TARGETS:
+        if info.min <= low and high <= info.max:
+            return name, sql_type, sql_name
+    return None
+
+
+def survives_float4(series: pd.Series) -> bool:
+    """
+    True if every value is unchanged after float32 storage and after
+    PostgreSQL's shortest float4 text output is read back as a double.
+    The first check is exact in binary, so col::double precision in the
+    dashboard aggregates sees the original doubles: 1234.56 stays
+    DOUBLE PRECISION, 1234.5 becomes REAL.
+    """
+    values = series.dropna().to_numpy(dtype="float64")
+    if len(values) == 0:
+        return False
+    as_float4 = values.astype("float32")
+    if not np.array_equal(as_float4.astype("float64"), values):
+        return False
+    # numpy prints float32 with the same shortest round-trip digits as PostgreSQL
+    return bool(np.array_equal(as_float4.astype(str).astype("float64"), values))
+
+
+def get_table_size(conn, table_name: str):
+    """
+    Total on-disk size of the table (data + TOAST + indexes), or None
+    if the database is not PostgreSQL.
+    """
+    try:
+        return conn.execute(
+            text("SELECT pg_total_relation_size(:name)"), {"name": f'public."{table_name}"'}
+        ).scalar()
+    except Exception:
+        conn.rollback()
+        return None
+
+
 # -----------------------------------------------
 # TABLE NAME GENERATOR
 # -----------------------------------------------
 
+COMPRESSED_SUFFIX = r"\.(gz|bz2|zst)$"
+
+
 def generate_table_name(file_name: str, upload_id: str) -> str:
     """
     Creates a safe PostgreSQL table name from the file name.
     Example: 'Sales Data Q3.xlsx' → 'sales_data_q3_a3f9b2c1'
     """
-    base = file_name.rsplit(".", 1)[0]           # Remove extension
+    base = re.sub(COMPRESSED_SUFFIX, "", file_name)  # Remove .gz/.bz2/.zst
+    base = base.rsplit(".", 1)[0]                # Remove extension
     base = base.lower()                           # Lowercase
     base = re.sub(r"[^\w]", "_", base)           # Replace special chars
     base = re.sub(r"_+", "_", base)              # Remove duplicate underscores
     base = base[:30]                              # Limit length
     short_id = upload_id.replace("-", "")[:8]   # Short unique suffix
+    # PostgreSQL would silently cut longer names (non-ASCII takes 2-4 bytes)
+    while len(f"{base}_{short_id}".encode("utf-8")) > MAX_IDENTIFIER_BYTES:
+        base = base[:-1]
     return f"{base}_{short_id}"
 
 
+def get_file_type(file_name: str) -> str:
+    """
+    Extension for the uploads log, keeping compression: 'a.csv.gz' → 'csv.gz'
+    """
+    match = re.search(r"\.(\w+" + COMPRESSED_SUFFIX + r"|\w+$)", file_name.lower())
+    return match.group(1) if match else "unknown"
+
+
 # -----------------------------------------------
 # UPLOAD LOGGER
 # -----------------------------------------------
@@ -173,7 +778,7 @@ def log_upload_status(upload_id, user_id, file_name, table_name, status, file_ty
     Logs every upload into the uploads table in PostgreSQL.
     """
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             conn.execute(text("""
                 INSERT INTO uploads (upload_id, user_id, file_name, file_type, table_name, status)
                 VALUES (:upload_id, :user_id, :file_name, :file_type, :table_name, :status)
@@ -204,7 +809,7 @@ def get_or_create_default_user() -> str:
     default_id = str(uuid.uuid4())
 
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             # Check if default user exists
             result = conn.execute(text(
                 "SELECT user_id FROM users WHERE email = :email"
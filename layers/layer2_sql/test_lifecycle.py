@@ -0,0 +1,96 @@
+import os
+import sys
+import uuid
+from unittest import mock
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="needs DATABASE_URL")
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import lifecycle
+from sql_engine import push_to_postgres
+from utils.database import get_engine
+
+
+@pytest.fixture
+def upload(tmp_path, monkeypatch):
+    """A small loaded upload table, archived to tmp_path; dropped afterwards."""
+    monkeypatch.setattr(lifecycle, "ARCHIVE_DIR", str(tmp_path))
+    lifecycle.ensure_lifecycle_schema()
+    df = pd.DataFrame({"region": ["North", "South"] * 50, "sales": range(100)})
+    result = push_to_postgres(df, file_name=f"lifecycle_{uuid.uuid4().hex[:6]}.csv")
+    yield result["upload_id"], result["table_name"]
+
+    with get_engine().connect() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS public."{result["table_name"]}"'))
+        conn.execute(text("DELETE FROM uploads WHERE upload_id = :id"), {"id": result["upload_id"]})
+        conn.commit()
+
+
+def upload_row(upload_id):
+    with get_engine().connect() as conn:
+        return conn.execute(text("SELECT status, claimed_at FROM uploads WHERE upload_id = :id"),
+                            {"id": upload_id}).fetchone()
+
+
+def table_rows(table_name):
+    with get_engine().connect() as conn:
+        return conn.execute(text(f'SELECT COUNT(*) FROM public."{table_name}"')).scalar()
+
+
+def claim(upload_id, status, age_s):
+    """Leaves the row as a worker that died age_s seconds ago would."""
+    with get_engine().connect() as conn:
+        conn.execute(text("""
+            UPDATE uploads SET status = :status, claimed_at = NOW() - make_interval(secs => :age)
+            WHERE upload_id = :id
+        """), {"status": status, "age": age_s, "id": upload_id})
+        conn.commit()
+
+
+# -----------------------------------------------
+# RECOVERY — Stale claims are released, fresh ones are left alone
+# -----------------------------------------------
+
+def test_stale_archiving_claim_returns_to_ready(upload):
+    upload_id, table_name = upload
+    partial = os.path.join(lifecycle.ARCHIVE_DIR, f"{table_name}.parquet")
+    open(partial, "wb").close()
+    claim(upload_id, "archiving", age_s=120)
+
+    assert (table_name, "ready") in lifecycle.recover_stale_claims(timeout_s=60)
+    assert upload_row(upload_id).status == "ready"
+    assert upload_row(upload_id).claimed_at is None
+    assert not os.path.exists(partial)
+    assert table_rows(table_name) == 100
+
+
+def test_fresh_claim_is_kept(upload):
+    upload_id, table_name = upload
+    claim(upload_id, "archiving", age_s=0)
+
+    assert (table_name, "ready") not in lifecycle.recover_stale_claims(timeout_s=60)
+    assert upload_row(upload_id).status == "archiving"
+
+
+def test_stale_rehydrating_claim_is_run_again(upload):
+    upload_id, table_name = upload
+    with get_engine().connect() as conn:
+        conn.execute(text("UPDATE uploads SET last_accessed_at = NOW() - INTERVAL '2 hours' WHERE upload_id = :id"),
+                     {"id": upload_id})
+        conn.commit()
+    claim(upload_id, "archiving", age_s=0)
+    assert lifecycle.archive_table(upload_id, table_name, ttl_hours=1)
+
+    # The rehydrating worker died before reloading anything
+    claim(upload_id, "rehydrating", age_s=120)
+
+    with mock.patch.object(lifecycle, "start_rehydration", side_effect=lifecycle.rehydrate_table):
+        assert (table_name, "archived") in lifecycle.recover_stale_claims(timeout_s=60)
+
+    assert upload_row(upload_id).status == "ready"
+    assert table_rows(table_name) == 100
@@ -0,0 +1,128 @@
+import os
+import sys
+from unittest import mock
+
+import uuid
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import sql_engine
+from sql_engine import compact_dtypes, generate_table_name, push_to_postgres, validate_table_name
+
+
+def sample_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "region": ["North", "South", "North", "South"] * 25,
+        "sales": [100, 200, 150, 300] * 25,
+        "revenue": [500.5, 800.0, 600.75, 1200.0] * 25,
+        "sale_date": ["2024-01-15", "2024-02-20", "2024-03-10", "2024-04-05"] * 25,
+    })
+
+
+# -----------------------------------------------
+# DTYPE COMPACTION — The caller's frame is never modified
+# -----------------------------------------------
+
+def test_compact_dtypes_returns_new_frame():
+    df = sample_frame()
+    before = df.dtypes.copy()
+
+    compacted, storage = compact_dtypes(df)
+
+    pd.testing.assert_series_equal(df.dtypes, before)
+    assert str(compacted["region"].dtype) == "category"
+    assert str(compacted["sales"].dtype) == "int16"
+    assert storage["columns"]["sales"]["sql_type"] == "SMALLINT"
+
+
+def test_push_to_postgres_leaves_input_dtypes_unchanged():
+    df = sample_frame()
+    before = df.dtypes.copy()
+    loaded = {}
+
+    def to_sql(frame, **kwargs):
+        loaded["dtypes"] = frame.dtypes.copy()
+
+    with mock.patch.object(sql_engine, "get_engine"), \
+            mock.patch.object(sql_engine, "get_or_create_default_user", return_value="user"), \
+            mock.patch.object(sql_engine, "log_upload_status"), \
+            mock.patch.object(sql_engine, "get_table_size", return_value=0), \
+            mock.patch.object(pd.DataFrame, "to_sql", to_sql):
+        push_to_postgres(df, file_name="sales.csv")
+
+    pd.testing.assert_series_equal(df.dtypes, before)
+    # ...while the loaded copy was typed and compacted
+    assert str(loaded["dtypes"]["sales"]) == "int16"
+    assert str(loaded["dtypes"]["sale_date"]).startswith("datetime64")
+
+
+def decimal_frame() -> pd.DataFrame:
+    # 1234.56 has no exact float32; 1234.5 and 0.25 do
+    return pd.DataFrame({
+        "price": [1234.56, 99.99, 0.1] * 40000,
+        "halves": [1234.5, 0.25, 7.0] * 40000,
+    })
+
+
+def test_compaction_keeps_decimal_aggregates():
+    df = decimal_frame()
+    compacted, storage = compact_dtypes(df)
+
+    assert str(compacted["price"].dtype) == "float64"
+    assert storage["columns"]["halves"]["sql_type"] == "REAL"
+    for col in df.columns:
+        # What SUM(col::double precision) sees for each stored value
+        widened = compacted[col].astype("float64")
+        assert widened.sum() == df[col].sum()
+        assert widened.mean() == df[col].mean()
+
+
+@pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="needs DATABASE_URL")
+def test_loaded_decimal_aggregates_match_source():
+    from sqlalchemy import text
+    from utils.database import get_engine
+
+    df = decimal_frame()
+    result = push_to_postgres(df, file_name="decimal_sums.csv")
+    try:
+        with get_engine().connect() as conn:
+            row = conn.execute(text(f"""
+                SELECT SUM(price::double precision), SUM(halves::double precision)
+                FROM public."{result['table_name']}"
+            """)).fetchone()
+        assert row[0] == pytest.approx(df["price"].sum(), rel=1e-10)
+        assert row[1] == pytest.approx(df["halves"].sum(), rel=1e-10)
+    finally:
+        with get_engine().connect() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS public."{result["table_name"]}"'))
+            conn.execute(text("DELETE FROM uploads WHERE upload_id = :id"), {"id": result["upload_id"]})
+            conn.commit()
+
+
+# -----------------------------------------------
+# TABLE NAMES — Every generated name passes validation
+# -----------------------------------------------
+
+@pytest.mark.parametrize("file_name", [
+    "Sales Data Q3.xlsx",
+    "2024 Sales.csv",
+    "données.csv",
+    "売上データ.parquet",
+    "é" * 40 + ".csv",
+    "report.csv.gz",
+    "  weird -- name!!.jsonl",
+    ".csv",
+])
+def test_generated_table_names_validate(file_name):
+    table_name = generate_table_name(file_name, str(uuid.uuid4()))
+    assert validate_table_name(table_name) == table_name
+    assert len(table_name.encode("utf-8")) <= 63
+
+
+@pytest.mark.parametrize("table_name", ["", "a;drop table x", 'a"b', "a b", "x" * 64, "../etc"])
+def test_invalid_table_names_rejected(table_name):
+    with pytest.raises(ValueError):
+        validate_table_name(table_name)
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import hashlib
 import sys
 import os
 
@@ -9,9 +10,111 @@ sys.path.append("../../layers/layer1_ingestion")
 sys.path.append("../../layers/layer2_sql")
 
 from ingestion import ingest_file
-from sql_engine import push_to_postgres, run_query, get_table_schema
+from sql_engine import push_to_postgres, run_query, get_table_schema, infer_data_types
 from insights import generate_insights
 
+# Scatter plots draw at most this many points (a fixed random sample)
+SCATTER_MAX_POINTS = int(os.getenv("SCATTER_MAX_POINTS", "20000"))
+
+# -----------------------------------------------
+# CACHED STEPS — Streamlit reruns this script on every widget change
+# -----------------------------------------------
+# Keyed by the uploaded file's SHA-256; arguments starting with "_"
+# are not hashed by Streamlit.
+
+@st.cache_data(show_spinner=False)
+def load_frame(file_hash: str, file_name: str, _file_bytes: bytes) -> pd.DataFrame:
+    """
+    Saves the upload and runs Layer 1 on it, once per file content.
+    Numbers and dates in text columns are typed here, the way the
+    table stores them, so the charts can find them.
+    """
+    temp_path = f"../../uploads/{file_name}"
+    with open(temp_path, "wb") as f:
+        f.write(_file_bytes)
+    return infer_data_types(ingest_file(temp_path))
+
+
+def store_frame(file_hash: str, file_name: str, df: pd.DataFrame) -> dict:
+    """
+    push_to_postgres once per file content and session; reruns and
+    re-uploads of the same file reuse the table already created.
+    """
+    uploads = st.session_state.setdefault("uploads", {})
+    if file_hash not in uploads:
+        uploads[file_hash] = push_to_postgres(df, file_name=file_name)
+    return uploads[file_hash]
+
+
+@st.cache_data(show_spinner=False)
+def cached_schema(table_name: str) -> dict:
+    return get_table_schema(table_name)
+
+
+@st.cache_data(show_spinner=False)
+def cached_insights(file_hash: str, table_name: str, _df: pd.DataFrame) -> str:
+    return generate_insights(_df, table_name)
+
+
+@st.cache_data(show_spinner=False)
+def chart_data(file_hash: str, _df: pd.DataFrame) -> dict:
+    """
+    Everything the charts and metric cards plot, computed once per file.
+    """
+    df = _df
+    numeric_cols = df.select_dtypes(include="number").columns.tolist()
+    categorical_cols = df.select_dtypes(include="object").columns.tolist()
+    date_cols = df.select_dtypes(include=["datetime", "datetimetz"]).columns.tolist()
+
+    data = {
+        "numeric_cols": numeric_cols,
+        "categorical_cols": categorical_cols,
+        "date_cols": date_cols,
+        "bar": None,
+        "line": None,
+        "corr": None,
+        "scatter": None,
+        "metrics": {col: (df[col].sum(), df[col].mean()) for col in numeric_cols[:4]},
+    }
+    if categorical_cols and numeric_cols:
+        data["bar"] = df.groupby(categorical_cols[0])[numeric_cols[0]].sum().reset_index()
+    if date_cols and numeric_cols:
+        data["line"] = df.groupby(date_cols[0])[numeric_cols[0]].sum().reset_index()
+    if len(numeric_cols) >= 2:
+        data["corr"] = df[numeric_cols].corr()
+        points = df[numeric_cols + categorical_cols[:1]]
+        if len(points) > SCATTER_MAX_POINTS:
+            points = points.sample(SCATTER_MAX_POINTS, random_state=0)
+        data["scatter"] = points
+    return data
+
+
+@st.fragment
+def scatter_plot(points: pd.DataFrame, numeric_cols: list, color_col, total_rows: int):
+    """
+    Reruns on its own when an axis changes, without touching the rest
+    of the page.
+    """
+    st.subheader("Scatter Plot")
+    col3, col4 = st.columns(2)
+    with col3:
+        x_axis = st.selectbox("X axis", numeric_cols, index=0)
+    with col4:
+        y_axis = st.selectbox("Y axis", numeric_cols, index=1)
+
+    fig5 = px.scatter(
+        points, x=x_axis, y=y_axis,
+        color=color_col,
+        title=f"{x_axis} vs {y_axis}",
+        template="plotly_dark",
+        render_mode="webgl",
+        size_max=15
+    )
+    st.plotly_chart(fig5, use_container_width=True)
+    if len(points) < total_rows:
+        st.caption(f"Showing a random sample of {len(points):,} of {total_rows:,} rows")
+
+
 # -----------------------------------------------
 # PAGE CONFIG
 # -----------------------------------------------
@@ -58,15 +161,13 @@ with st.sidebar:
 
 if uploaded_file is not None:
 
-    # Save uploaded file temporarily
-    temp_path = f"../../uploads/{uploaded_file.name}"
-    with open(temp_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
+    file_bytes = uploaded_file.getvalue()
+    file_hash = hashlib.sha256(file_bytes).hexdigest()
 
     # ---- LAYER 1: Ingest ----
     with st.spinner("📥 Reading your file..."):
         try:
-            df = ingest_file(temp_path)
+            df = load_frame(file_hash, uploaded_file.name, file_bytes)
             st.success(f"✅ File loaded — {df.shape[0]} rows × {df.shape[1]} columns")
         except Exception as e:
             st.error(f"❌ Could not read file: {e}")
@@ -75,7 +176,7 @@ if uploaded_file is not None:
     # ---- LAYER 2: Push to PostgreSQL ----
     with st.spinner("🗄️ Pushing to database..."):
         try:
-            metadata = push_to_postgres(df, file_name=uploaded_file.name)
+            metadata = store_frame(file_hash, uploaded_file.name, df)
             table_name = metadata["table_name"]
             st.success(f"✅ Stored as table: `{table_name}`")
         except Exception as e:
@@ -93,7 +194,7 @@ if uploaded_file is not None:
 
     # Schema info
     with st.expander("🗂️ Table Schema", expanded=False):
-        schema = get_table_schema(table_name)
+        schema = cached_schema(table_name)
         schema_df = pd.DataFrame(schema["columns"])
         st.dataframe(schema_df, use_container_width=True)
 
@@ -102,19 +203,20 @@ if uploaded_file is not None:
     # ---- AUTO CHARTS ----
     st.header("📈 Auto-Generated Charts")
 
-    numeric_cols = df.select_dtypes(include="number").columns.tolist()
-    categorical_cols = df.select_dtypes(include="object").columns.tolist()
-    date_cols = df.select_dtypes(include=["datetime", "datetimetz"]).columns.tolist()
+    charts = chart_data(file_hash, df)
+    numeric_cols = charts["numeric_cols"]
+    categorical_cols = charts["categorical_cols"]
+    date_cols = charts["date_cols"]
 
     # Chart 1 — Bar chart (categorical vs numeric)
-    if categorical_cols and numeric_cols:
+    if charts["bar"] is not None:
         col1, col2 = st.columns(2)
 
         with col1:
             st.subheader("Bar Chart")
             cat = categorical_cols[0]
             num = numeric_cols[0]
-            bar_data = df.groupby(cat)[num].sum().reset_index()
+            bar_data = charts["bar"]
             fig = px.bar(
                 bar_data, x=cat, y=num,
                 color=cat,
@@ -133,13 +235,12 @@ if uploaded_file is not None:
             st.plotly_chart(fig2, use_container_width=True)
 
     # Chart 2 — Line chart (date vs numeric)
-    if date_cols and numeric_cols:
+    if charts["line"] is not None:
         st.subheader("Trend Over Time")
         date_col = date_cols[0]
         num_col = numeric_cols[0]
-        line_data = df.groupby(date_col)[num_col].sum().reset_index()
         fig3 = px.line(
-            line_data, x=date_col, y=num_col,
+            charts["line"], x=date_col, y=num_col,
             title=f"{num_col} over time",
             template="plotly_dark",
             markers=True
@@ -147,11 +248,10 @@ if uploaded_file is not None:
         st.plotly_chart(fig3, use_container_width=True)
 
     # Chart 3 — Correlation heatmap
-    if len(numeric_cols) >= 2:
+    if charts["corr"] is not None:
         st.subheader("Correlation Heatmap")
-        corr = df[numeric_cols].corr()
         fig4 = px.imshow(
-            corr,
+            charts["corr"],
             text_auto=True,
             color_continuous_scale="RdBu",
             title="Correlation between numeric columns",
@@ -159,24 +259,10 @@ if uploaded_file is not None:
         )
         st.plotly_chart(fig4, use_container_width=True)
 
-    # Chart 4 — Scatter plot
-    if len(numeric_cols) >= 2:
-        st.subheader("Scatter Plot")
-        col3, col4 = st.columns(2)
-        with col3:
-            x_axis = st.selectbox("X axis", numeric_cols, index=0)
-        with col4:
-            y_axis = st.selectbox("Y axis", numeric_cols, index=1)
-
+    # Chart 4 — Scatter plot (WebGL, downsampled, redrawn on its own)
+    if charts["scatter"] is not None:
         color_col = categorical_cols[0] if categorical_cols else None
-        fig5 = px.scatter(
-            df, x=x_axis, y=y_axis,
-            color=color_col,
-            title=f"{x_axis} vs {y_axis}",
-            template="plotly_dark",
-            size_max=15
-        )
-        st.plotly_chart(fig5, use_container_width=True)
+        scatter_plot(charts["scatter"], numeric_cols, color_col, len(df))
 
     st.divider()
 
@@ -184,7 +270,7 @@ if uploaded_file is not None:
     st.header("🤖 AI Insights")
 
     with st.spinner("Analyzing your data with AI..."):
-        insights = generate_insights(df, table_name)
+        insights = cached_insights(file_hash, table_name, df)
 
     st.markdown(insights)
 
@@ -194,12 +280,12 @@ if uploaded_file is not None:
     st.header("📌 Key Metrics")
 
     cols = st.columns(len(numeric_cols[:4]))
-    for i, col_name in enumerate(numeric_cols[:4]):
+    for i, (col_name, (total, mean)) in enumerate(charts["metrics"].items()):
         with cols[i]:
             st.metric(
                 label=col_name.replace("_", " ").title(),
-                value=f"{df[col_name].sum():,.2f}",
-                delta=f"avg: {df[col_name].mean():,.2f}"
+                value=f"{total:,.2f}",
+                delta=f"avg: {mean:,.2f}"
             )
 
 else:
@@ -1,24 +1,70 @@
-import google.generativeai as genai
 from dotenv import load_dotenv
 import os
+import sys
+import warnings
+import numpy as np
 import pandas as pd
 
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.insert(0, BASE_DIR)
+
+from utils.observability import span
+
 load_dotenv()
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-2.0-flash")
+# Prompt size limits for build_data_summary (≈4 characters per token)
+SUMMARY_TOKEN_BUDGET = int(os.getenv("INSIGHTS_TOKEN_BUDGET", "2000"))
+SUMMARY_MAX_COLUMNS = int(os.getenv("INSIGHTS_MAX_COLUMNS", "25"))
+SUMMARY_SAMPLE_ROWS = int(os.getenv("INSIGHTS_SAMPLE_ROWS", "8"))
+SUMMARY_SAMPLE_COLUMNS = 12
+SUMMARY_MAX_CELL_CHARS = 30
+CHARS_PER_TOKEN = 4
+PROFILE_MAX_ROWS = 20_000
+# Wider tables are pre-ranked on cheap stats and only this many columns
+# get a full profile (distinct counts, numeric stats)
+PROFILE_MAX_COLUMNS = int(os.getenv("INSIGHTS_PROFILE_COLUMNS", "100"))
+PRERANK_ROWS = 500
+STRATIFY_MAX_GROUPS = 50
+
+GEMINI_MODEL = "gemini-2.0-flash"
+
+
+# -----------------------------------------------
+# MODEL — Lazily configured Gemini client
+# -----------------------------------------------
+
+# Created on first use (or in the FastAPI lifespan hook), not at import
+_model = None
+
+
+def get_model():
+    """
+    Configures Gemini and returns the model on first call.
+    The google-generativeai / gRPC stack is only imported here.
+    """
+    global _model
+    if _model is None:
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        _model = genai.GenerativeModel(GEMINI_MODEL)
+    return _model
+
 
 # -----------------------------------------------
 # MAIN — Generate AI insights from a DataFrame
 # -----------------------------------------------
 
-def generate_insights(df: pd.DataFrame, table_name: str) -> str:
+def generate_insights(df: pd.DataFrame, table_name: str, total_rows: int = None) -> str:
     """
     Sends a summary of the DataFrame to Gemini
     and gets back a written analysis of key insights.
+    If df is a sample of the table, pass the table's row count as total_rows.
     """
     try:
-        summary = build_data_summary(df)
+        with span("insights.summary", rows=df.shape[0], columns=df.shape[1]) as s:
+            summary = build_data_summary(df, total_rows=total_rows)
+            s["chars"] = len(summary)
 
         prompt = f"""
 You are a senior data analyst. Analyze this dataset and provide:
@@ -33,7 +79,8 @@ Dataset summary:
 Be concise, specific, and use numbers where possible.
 Write in clear bullet points.
 """
-        response = model.generate_content(prompt)
+        with span("insights.llm", table=table_name):
+            response = get_model().generate_content(prompt)
         return response.text
 
     except Exception as e:
@@ -41,19 +88,200 @@ Write in clear bullet points.
 
 
 # -----------------------------------------------
-# HELPER — Build a text summary of the DataFrame
+# HELPER — Build a bounded text summary of the DataFrame
 # -----------------------------------------------
 
-def build_data_summary(df: pd.DataFrame) -> str:
+def build_data_summary(df: pd.DataFrame, token_budget: int = None,
+                       max_columns: int = None, sample_rows: int = None,
+                       total_rows: int = None) -> str:
+    """
+    Builds a prompt-sized summary of the DataFrame.
+    Columns are profiled in one vectorized pass, ranked by how
+    informative they are, and only the top ones are described.
+    Very wide tables are narrowed to PROFILE_MAX_COLUMNS first.
+    Rows are a stratified sample rather than the head, and the
+    result is cut to fit the token budget.
+    """
+    token_budget = token_budget or SUMMARY_TOKEN_BUDGET
+    max_columns = max_columns or SUMMARY_MAX_COLUMNS
+    sample_rows = sample_rows or SUMMARY_SAMPLE_ROWS
+
+    n_columns = df.shape[1]
+    df = df[candidate_columns(df, max(max_columns, PROFILE_MAX_COLUMNS))]
+    frame = profile_frame(df)
+    profile = profile_columns(df, frame)
+    top = profile.sort_values("score", ascending=False, kind="stable").head(max_columns)
+
     lines = []
-    lines.append(f"Rows: {df.shape[0]}, Columns: {df.shape[1]}")
-    lines.append(f"Column names: {list(df.columns)}")
-    lines.append(f"\nData types:\n{df.dtypes.to_string()}")
+    lines.append(f"Rows: {total_rows or df.shape[0]}, Columns: {n_columns}")
+    if total_rows and total_rows > len(df):
+        lines.append(f"Profiled on a random sample of {len(df)} rows")
+    if len(top) < n_columns:
+        lines.append(f"Showing the {len(top)} most informative columns of {n_columns}")
+
+    table = top.drop(columns="score").copy()
+    table["non_null"] = (table["non_null"] * 100).round(1).astype(str) + "%"
+    lines.append(f"\nColumn profiles:\n{table.to_string(float_format=lambda v: f'{v:,.4g}')}")
+
+    sample_cols = list(top.index[:SUMMARY_SAMPLE_COLUMNS])
+    sample = stratified_sample(df, frame, sample_cols, profile, sample_rows)
+    lines.append(f"\nSample rows:\n{sample.to_string(max_colwidth=SUMMARY_MAX_CELL_CHARS)}")
+
+    return truncate_summary("\n".join(lines), token_budget * CHARS_PER_TOKEN)
+
+
+# -----------------------------------------------
+# HELPER — Column profiles in one vectorized pass
+# -----------------------------------------------
+
+def candidate_columns(df: pd.DataFrame, max_columns: int) -> list:
+    """
+    Picks the columns worth a full profile when there are more than
+    max_columns, from the dtype and null ratio on PRERANK_ROWS evenly
+    spread rows, so the cost stays flat as columns grow. Typed columns
+    (numbers, dates, booleans) rank above text; ties keep the order.
+    """
+    if df.shape[1] <= max_columns:
+        return list(df.columns)
+    if len(df):
+        positions = np.unique(np.linspace(0, len(df) - 1, min(len(df), PRERANK_ROWS)).astype(int))
+        non_null = df.iloc[positions].notna().mean()
+    else:
+        non_null = pd.Series(0.0, index=df.columns)
+    is_text = df.dtypes.map(lambda dtype: dtype == object or isinstance(dtype, (pd.StringDtype, pd.CategoricalDtype)))
+    rank = non_null * np.where(is_text, 0.75, 1.0)
+    order = np.argsort(-rank.to_numpy(), kind="stable")[:max_columns]
+    return list(df.columns[np.sort(order)])
+
+
+def profile_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the rows used for profiling. Large tables are cut to a
+    fixed-size random sample so the cost stays flat as rows grow.
+    """
+    if len(df) <= PROFILE_MAX_ROWS:
+        return df
+    rng = np.random.default_rng(0)
+    positions = np.sort(rng.choice(len(df), PROFILE_MAX_ROWS, replace=False))
+    return df.take(positions)
 
-    numeric_cols = df.select_dtypes(include="number")
-    if not numeric_cols.empty:
-        lines.append(f"\nNumeric summary:\n{numeric_cols.describe().to_string()}")
 
-    lines.append(f"\nFirst 5 rows:\n{df.head().to_string()}")
+def profile_columns(df: pd.DataFrame, frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns one row per column with dtype, non-null ratio, distinct
+    count, numeric stats and an informativeness score.
+    """
+    profile = pd.DataFrame({
+        "dtype": df.dtypes.astype(str),
+        "non_null": frame.notna().mean() if len(frame) else 0.0,
+        "distinct": count_distinct(frame),
+    })
+
+    numeric = frame.select_dtypes(include="number")
+    for stat in ["mean", "std", "min", "max"]:
+        profile[stat] = np.nan
+    if not numeric.empty:
+        values = numeric.to_numpy(dtype="float64", na_value=np.nan)
+        with warnings.catch_warnings():
+            # All-NaN columns are expected here, they just profile as NaN
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            stats = pd.DataFrame({
+                "mean": np.nanmean(values, axis=0),
+                "std": np.nanstd(values, axis=0),
+                "min": np.nanmin(values, axis=0),
+                "max": np.nanmax(values, axis=0),
+            }, index=numeric.columns)
+        profile.loc[stats.index, stats.columns] = stats
+
+    profile["score"] = score_columns(profile, frame)
+    return profile
+
+
+def count_distinct(frame: pd.DataFrame) -> pd.Series:
+    """
+    nunique per column. Nested values (dicts / lists from JSONL) can't
+    be hashed, so those columns are counted on their text instead.
+    """
+    try:
+        return frame.nunique(dropna=True)
+    except TypeError:
+        return frame.apply(lambda col: hashable_values(col).nunique(dropna=True))
+
+
+def hashable_values(col: pd.Series) -> pd.Series:
+    if col.dtype != object or not col.map(lambda v: isinstance(v, (dict, list, np.ndarray))).any():
+        return col
+    return col.where(col.isna(), col.astype(str))
+
+
+def score_columns(profile: pd.DataFrame, frame: pd.DataFrame) -> pd.Series:
+    """
+    Ranks columns by how much they tell the model:
+    - Constant or empty columns score 0
+    - Sparse columns score lower in proportion to their nulls
+    - High-cardinality text (free text) is halved
+    - Unique text or integer columns are treated as IDs and pushed down
+    Ties keep the original column order.
+    """
+    is_numeric = profile.index.isin(frame.select_dtypes(include="number").columns)
+    is_text = ~is_numeric & ~profile.index.isin(
+        frame.select_dtypes(include=["datetime", "datetimetz"]).columns
+    )
+    is_int = profile["dtype"].str.startswith(("int", "Int", "uint", "UInt"))
+
+    filled = (profile["non_null"] * len(frame)).clip(lower=1)
+    distinct_ratio = profile["distinct"] / filled
+    is_id = (distinct_ratio > 0.95) & (profile["distinct"] > 20)
+
+    weight = pd.Series(1.0, index=profile.index)
+    weight[is_text & (profile["distinct"] > STRATIFY_MAX_GROUPS)] = 0.5
+    weight[is_id & (is_text | is_int)] = 0.2
+
+    score = profile["non_null"] * weight
+    return score.where(profile["distinct"] > 1, 0.0)
+
+
+# -----------------------------------------------
+# HELPER — Stratified row sample
+# -----------------------------------------------
+
+def stratified_sample(df: pd.DataFrame, frame: pd.DataFrame, columns: list,
+                      profile: pd.DataFrame, n: int) -> pd.DataFrame:
+    """
+    Picks up to n rows that cover the data better than df.head():
+    one row from each of the largest groups of the best low-cardinality
+    text column, topped up with rows spread evenly across the table.
+    """
+    if df.empty or n <= 0:
+        return df[columns].head(0)
+
+    picked = frame.index[:0]
+    numeric = set(frame.select_dtypes(include=["number", "datetime", "datetimetz"]).columns)
+    strata = [
+        col for col in columns
+        if col not in numeric and 2 <= profile.at[col, "distinct"] <= STRATIFY_MAX_GROUPS
+    ]
+    if strata:
+        key = hashable_values(frame[strata[0]])
+        groups = key.value_counts().head(n).index
+        in_groups = key[key.isin(groups)]
+        picked = in_groups.groupby(in_groups, sort=False, observed=True).sample(1, random_state=0).index
+
+    spread = frame.index[np.linspace(0, len(frame) - 1, n).astype(int)]
+    rows = picked.append(spread.difference(picked)).unique()[:n]
+    return df.loc[sorted(rows), columns]
+
+
+# -----------------------------------------------
+# HELPER — Cut the summary to the character budget
+# -----------------------------------------------
+
+def truncate_summary(summary: str, max_chars: int) -> str:
+    if len(summary) <= max_chars:
+        return summary
 
-    return "\n".join(lines)
\ No newline at end of file
+    marker = "\n... (summary truncated)"
+    cut = summary[:max(max_chars - len(marker), 0)]
+    if "\n" in cut:
+        cut = cut[:cut.rindex("\n")]
+    return cut + marker
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import insights
+from insights import build_data_summary, candidate_columns
+
+
+def wide_frame(columns: int, rows: int = 5000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    kinds = [
+        lambda: rng.normal(size=rows),
+        lambda: rng.integers(0, 100, rows),
+        lambda: rng.choice(["North", "South", "East"], rows),
+        lambda: np.where(rng.random(rows) < 0.3, None, rng.choice(["x", "y"], rows)),
+    ]
+    return pd.DataFrame({f"col_{i}": kinds[i % 4]() for i in range(columns)})
+
+
+# -----------------------------------------------
+# WIDE TABLES — Only PROFILE_MAX_COLUMNS get a full profile
+# -----------------------------------------------
+
+def test_candidate_columns_prefers_filled_typed_columns():
+    df = pd.DataFrame({
+        "empty": [None] * 4,
+        "text": ["a", "b", "c", "d"],
+        "sparse": [1.0, None, None, None],
+        "number": [1, 2, 3, 4],
+    })
+    assert candidate_columns(df, 10) == list(df.columns)
+    assert candidate_columns(df, 2) == ["text", "number"]
+
+
+def test_wide_frame_profiles_capped_columns():
+    df = wide_frame(2000)
+    with mock.patch.object(insights, "profile_columns", wraps=insights.profile_columns) as profile:
+        summary = build_data_summary(df)
+
+    assert profile.call_args.args[0].shape[1] == insights.PROFILE_MAX_COLUMNS
+    assert "Columns: 2000" in summary
+    assert "most informative columns of 2000" in summary
+
+
+def test_build_time_stays_flat_on_wide_frames():
+    def best_time(df):
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            build_data_summary(df)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    narrow = best_time(wide_frame(insights.PROFILE_MAX_COLUMNS))
+    wide = best_time(wide_frame(40 * insights.PROFILE_MAX_COLUMNS))
+    # 40x the columns; a full profile of every column was ~20x slower
+    assert wide < 5 * narrow, f"{wide:.3f}s vs {narrow:.3f}s"
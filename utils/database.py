@@ -1,16 +1,127 @@
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from dotenv import load_dotenv
 import os
+import sys
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.insert(0, BASE_DIR)
+
+from utils.observability import watch_pool
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# -----------------------------------------------
+# POOL CONFIG — Shared by the sync and async engines
+# -----------------------------------------------
+
+# Each engine keeps up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections per
+# worker process; size this against the server's max_connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle before poolers / load balancers drop idle connections
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Applied to query connections: the async engine (request handlers) and
+# run_query. Loads, archiving and other maintenance on the sync engine
+# run without a limit. 0 disables it.
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "60000"))
+
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": True,
+}
+
+# Created on first use (or in the FastAPI lifespan hook), not at import
+_engine = None
+_async_engine = None
+
+
+# -----------------------------------------------
+# SYNC ENGINE — Loaders, background jobs, scripts
+# -----------------------------------------------
+
+def get_engine():
+    """
+    No statement timeout here: a big COPY, type change or archive export
+    can legitimately run for minutes. Interactive queries on this engine
+    set one per transaction (see statement_timeout_sql).
+    """
+    global _engine
+    if _engine is None:
+        _engine = create_engine(DATABASE_URL, **POOL_OPTIONS)
+        watch_pool("sync", _engine)
+    return _engine
+
+
+def dispose_engine() -> None:
+    """
+    Closes every pooled connection. Called on app shutdown.
+    """
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+
+
+# -----------------------------------------------
+# ASYNC ENGINE — asyncpg, for request handlers
+# -----------------------------------------------
+
+def get_async_engine():
+    """
+    Async engine on the same database, so route handlers can await
+    queries (and run several at once) without holding a thread.
+    """
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        _async_engine = create_async_engine(
+            async_url(DATABASE_URL),
+            connect_args={"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+            if DB_STATEMENT_TIMEOUT_MS else {},
+            **POOL_OPTIONS,
+        )
+        watch_pool("async", _async_engine.sync_engine)
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
+def statement_timeout_sql(timeout_ms: int = None):
+    """
+    SET LOCAL statement_timeout for the current transaction (0 = no
+    limit). Defaults to DB_STATEMENT_TIMEOUT_MS.
+    """
+    timeout_ms = DB_STATEMENT_TIMEOUT_MS if timeout_ms is None else timeout_ms
+    return text(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+def async_url(url: str):
+    """
+    Points a postgresql:// URL at the asyncpg driver. asyncpg takes
+    "ssl" where libpq takes "sslmode".
+    """
+    url = make_url(url).set(drivername="postgresql+asyncpg")
+    if "sslmode" in url.query:
+        url = url.update_query_dict({"ssl": url.query["sslmode"]}).difference_update_query(["sslmode"])
+    return url
+
 
 def test_connection():
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             result = conn.execute(text("SELECT version();"))
             version = result.fetchone()
             print(f"✅ Connected to PostgreSQL!")
@@ -19,4 +130,4 @@ def test_connection():
         print(f"❌ Connection failed: {e}")
 
 if __name__ == "__main__":
-    test_connection()
\ No newline at end of file
+    test_connection()
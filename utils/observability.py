@@ -0,0 +1,224 @@
+import cProfile
+import contextvars
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# -----------------------------------------------
+# CONFIG
+# -----------------------------------------------
+
+# Requests slower than this are profiled and dumped to PROFILE_DIR.
+# Unset = profiling off, unless a request opts in with the profile header.
+PROFILE_SLOW_MS = os.getenv("PROFILE_SLOW_MS")
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILE_HEADER = "x-datamind-profile"
+# The profile header costs CPU and disk, so clients may only use it when enabled
+PROFILE_HEADER_ENABLED = os.getenv("PROFILE_ALLOW_HEADER", "0") == "1"
+
+# Client-sent request ids are reused as trace ids (and in profile file
+# names) only if they look like one; anything else gets a fresh id
+TRACE_ID_PATTERN = re.compile(r"[A-Za-z0-9-]{1,64}")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+logger = logging.getLogger("datamind")
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# -----------------------------------------------
+# METRICS
+# -----------------------------------------------
+
+STAGE_SECONDS = Histogram(
+    "datamind_stage_duration_seconds",
+    "Time spent in each pipeline stage",
+    ["stage", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_ROWS = Counter("datamind_stage_rows_total", "Rows processed per stage", ["stage"])
+STAGE_BYTES = Counter("datamind_stage_bytes_total", "Bytes processed per stage", ["stage"])
+
+REQUEST_SECONDS = Histogram(
+    "datamind_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+POOL_SIZE = Gauge("datamind_db_pool_size", "Configured pool size", ["pool"])
+POOL_CHECKED_OUT = Gauge("datamind_db_pool_checked_out", "Connections in use", ["pool"])
+POOL_OVERFLOW = Gauge("datamind_db_pool_overflow", "Connections above pool size", ["pool"])
+POOL_UTILIZATION = Gauge(
+    "datamind_db_pool_utilization", "Checked-out connections / pool size", ["pool"]
+)
+
+# Engines whose pools are reported on every /metrics scrape
+_pools = {}
+
+# -----------------------------------------------
+# TRACE CONTEXT — Links spans of one request
+# -----------------------------------------------
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_profile_requested = contextvars.ContextVar("profile_requested", default=False)
+
+
+def start_trace(trace_id: str = None, profile: bool = False) -> str:
+    """
+    Starts a new trace for the current request.
+    Every span opened afterwards in this context carries its id.
+    profile is ignored unless PROFILE_ALLOW_HEADER=1.
+    """
+    if not trace_id or not TRACE_ID_PATTERN.fullmatch(trace_id):
+        trace_id = uuid.uuid4().hex[:16]
+    _trace_id.set(trace_id)
+    _current_span.set(None)
+    _profile_requested.set(profile and PROFILE_HEADER_ENABLED)
+    return trace_id
+
+
+# -----------------------------------------------
+# SPAN — Time one stage of the pipeline
+# -----------------------------------------------
+
+@contextmanager
+def span(stage: str, **attrs):
+    """
+    Times a block of work and records it as a stage.
+    Yields a dict: set "rows" or "bytes" on it to count them.
+    Emits one JSON log line per span and feeds the Prometheus histograms.
+
+        with span("ingest.parse", format="csv") as s:
+            df = pd.read_csv(path)
+            s["rows"] = len(df)
+    """
+    record = dict(attrs)
+    span_id = uuid.uuid4().hex[:8]
+    parent = _current_span.get()
+    token = _current_span.set(span_id)
+    status = "ok"
+    start = time.perf_counter()
+
+    try:
+        yield record
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _current_span.reset(token)
+
+        STAGE_SECONDS.labels(stage, status).observe(elapsed)
+        if record.get("rows") is not None:
+            STAGE_ROWS.labels(stage).inc(record["rows"])
+        if record.get("bytes") is not None:
+            STAGE_BYTES.labels(stage).inc(record["bytes"])
+
+        logger.info(json.dumps({
+            "event": "span",
+            "stage": stage,
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 2),
+            "trace_id": _trace_id.get(),
+            "span_id": span_id,
+            "parent_id": parent,
+            **record,
+        }, default=str))
+
+
+# -----------------------------------------------
+# POOL GAUGES — Reported on every scrape
+# -----------------------------------------------
+
+def watch_pool(name: str, engine) -> None:
+    """
+    Registers a SQLAlchemy engine so its pool usage shows up in /metrics.
+    """
+    _pools[name] = engine
+
+
+def update_pool_metrics() -> None:
+    for name, engine in _pools.items():
+        pool = engine.pool
+        if not hasattr(pool, "checkedout"):
+            continue  # NullPool / StaticPool have nothing to report
+        size = pool.size()
+        checked_out = pool.checkedout()
+        POOL_SIZE.labels(name).set(size)
+        POOL_CHECKED_OUT.labels(name).set(checked_out)
+        POOL_OVERFLOW.labels(name).set(max(pool.overflow(), 0))
+        POOL_UTILIZATION.labels(name).set(checked_out / size if size else 0)
+
+
+def render_metrics() -> tuple:
+    """
+    Returns (body, content_type) for the /metrics endpoint.
+    """
+    update_pool_metrics()
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# -----------------------------------------------
+# PROFILING — Opt-in cProfile dumps for slow requests
+# -----------------------------------------------
+
+@contextmanager
+def profile_request(name: str):
+    """
+    Profiles the block with cProfile when PROFILE_SLOW_MS is set or the
+    request sent the profile header (and PROFILE_ALLOW_HEADER=1). The profile is written to PROFILE_DIR
+    if the block was slower than the threshold (always, if requested).
+    cProfile only sees the current thread, so wrap the handler body itself.
+    """
+    requested = _profile_requested.get()
+    if PROFILE_SLOW_MS is None and not requested:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active in this process
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        threshold = float(PROFILE_SLOW_MS) if PROFILE_SLOW_MS is not None else 0.0
+
+        if requested or elapsed_ms >= threshold:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            trace_id = _trace_id.get() or uuid.uuid4().hex[:16]
+            path = os.path.join(PROFILE_DIR, f"{name}_{trace_id}.prof")
+            profiler.dump_stats(path)
+            logger.info(json.dumps({
+                "event": "profile",
+                "name": name,
+                "trace_id": trace_id,
+                "duration_ms": round(elapsed_ms, 2),
+                "path": os.path.abspath(path),
+            }))